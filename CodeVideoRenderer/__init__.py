@@ -2,5 +2,15 @@ from .renderer import *
 from .config import *
 from .typing import *
 from .utils import *
+from .raster import *
+from .plan import *
+from .glow import *
+from .cache import *
+from .encoder import *
+from .tracing import *
+from .progress import *
+from .glyphs import *
+from .layout import *
+from .batch import *
 
 __version__ = '1.2.0-alpha'
\ No newline at end of file
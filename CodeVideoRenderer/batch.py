@@ -0,0 +1,176 @@
+from manim import Code, config, tempconfig
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Literal, Union
+import json, traceback
+
+from .config import *
+from .typing import *
+from .utils import *
+from .renderer import CameraFollowCursorCV, RenderOptions
+from .layout import keepCodeLayouts
+from .encoder import EncoderConfig
+from .cache import RenderCache
+from .progress import ProgressSink, defaultProgress
+
+@dataclass
+class BatchJob:
+    """
+    A video rendered by `renderBatch`.
+
+    Attributes:
+        code (Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath], tuple[Literal['plan'], StrPath]]): The code to be animated, as accepted by `CameraFollowCursorCV`.
+        language (PygmentsLanguage): The programming language of the code.
+        formatter_style (PygmentsFormatterStyle): The style for syntax highlighting. Defaults to `"github-dark"`.
+        video_name (str): The name of the output video file. Defaults to `"CameraFollowCursorCV"`.
+        options (dict[str, Any]): Other arguments of `CameraFollowCursorCV`. Defaults to `{}`.
+        render_options (dict[str, Any]): Arguments of `CameraFollowCursorCV.render`, except `output`. Defaults to `{}`.
+    """
+    code: Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath], tuple[Literal['plan'], StrPath]]
+    language: PygmentsLanguage
+    formatter_style: PygmentsFormatterStyle = "github-dark"
+    video_name: str = "CameraFollowCursorCV"
+    options: dict[str, Any] = field(default_factory=dict)
+    render_options: dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class BatchResult:
+    """
+    The result of a `BatchJob`.
+
+    Attributes:
+        job (BatchJob): The job.
+        path (Path | None): The output video, or `None` if the job failed.
+        seconds (float): The time spent on the job in its worker process.
+        error (str | None): The traceback of the failure, or `None` if the job succeeded.
+    """
+    job: BatchJob
+    path: Path | None
+    seconds: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job succeeded."""
+        return self.error is None
+
+def loadManifest(path: StrPath) -> list[BatchJob]:
+    """
+    Load batch jobs from a JSON manifest.
+
+    The manifest is a list of objects with either a `code` string or a `file` path (relative to the manifest),
+    a `language` and optionally `formatter_style`, `video_name`, `options` and `render_options`. The fields of
+    `RenderOptions` in `render_options` are collected into its `options` argument, an `encoder` is given as an
+    object with the fields of `EncoderConfig`, a `cache` as the directory of a `RenderCache` (relative to the
+    manifest).
+
+    Args:
+        path (StrPath): The manifest file.
+
+    Returns:
+        list[BatchJob]: The jobs, in order.
+
+    Raises:
+        ValueError: If an entry has neither or both of `code` and `file`.
+    """
+    base = Path(path).parent
+    jobs = []
+    for index, entry in enumerate(json.loads(Path(path).read_text(encoding="utf-8"))):
+        if ('code' in entry) == ('file' in entry):
+            raise ValueError(f"Entry {index} of '{path}' must have exactly one of 'code' and 'file'")
+        render_options = dict(entry.get('render_options', {}))
+        options = {option.name: render_options.pop(option.name) for option in fields(RenderOptions) if option.name in render_options}
+        if isinstance(options.get('encoder'), dict):
+            encoder = options['encoder']
+            options['encoder'] = EncoderConfig(**{**encoder, 'extra_args': tuple(encoder.get('extra_args', ()))})
+        if options:
+            render_options['options'] = RenderOptions(**options)
+        if isinstance(render_options.get('cache'), str):
+            render_options['cache'] = RenderCache(base / render_options['cache'])
+        jobs.append(BatchJob(
+            code=('string', entry['code']) if 'code' in entry else ('file', str(base / entry['file'])),
+            language=entry['language'],
+            formatter_style=entry.get('formatter_style', "github-dark"),
+            video_name=entry.get('video_name', "CameraFollowCursorCV"),
+            options=entry.get('options', {}),
+            render_options=render_options
+        ))
+    return jobs
+
+def _warmWorker() -> None:
+    """Keep the code font registered and built code layouts in memory in a worker process, and build a layout once, so that jobs start warm."""
+    keepCodeFont()
+    keepCodeLayouts()
+    with noManimOutput():
+        Code(code_string="pass", language="python", paragraph_config={'font': 'CodeVideoRendererFont'})
+
+def _renderJob(scene_config, job: BatchJob) -> BatchResult:
+    """Render a job in a worker process, reporting a failure instead of raising it."""
+    start_time = perf_counter()
+    try:
+        # 每个任务使用同一份配置，前一个任务的修改（包括失败时未恢复的修改）不会影响下一个任务
+        with tempconfig(scene_config):
+            code_video = CameraFollowCursorCV(
+                code=job.code,
+                language=job.language,
+                formatter_style=job.formatter_style,
+                video_name=job.video_name,
+                **job.options
+            )
+            path = code_video.render(output=False, **job.render_options)
+    except Exception:
+        return BatchResult(job, None, perf_counter() - start_time, traceback.format_exc())
+    return BatchResult(job, path, perf_counter() - start_time)
+
+@typeChecker
+def renderBatch(jobs: Union[list[BatchJob], StrPath], workers: int = DEFAULT_BATCH_WORKERS, output: bool = DEFAULT_OUTPUT_VALUE, progress: ProgressSink | None = None) -> list[BatchResult]:
+    """
+    Render many videos with a pool of warm worker processes.
+
+    The workers import manim once and keep the code font registered between jobs. A failed job is reported in
+    its result and does not stop the other jobs.
+
+    Args:
+        jobs (Union[list[BatchJob], StrPath]): The jobs, or the path of a manifest read by `loadManifest`.
+        workers (int): The number of worker processes. Defaults to `DEFAULT_BATCH_WORKERS`.
+        output (bool): Whether to display a progress bar and the failed jobs. Defaults to `DEFAULT_OUTPUT_VALUE`.
+        progress (ProgressSink | None): Where the progress of the batch is reported. Defaults to `None`, which uses `defaultProgress(output)`.
+
+    Returns:
+        list[BatchResult]: The result of each job, in the order of `jobs`.
+    """
+    if workers < 1:
+        raise ValueError("workers must be greater than or equal to 1")
+    if not isinstance(jobs, list):
+        jobs = loadManifest(jobs)
+
+    results: list[BatchResult | None] = [None] * len(jobs)
+    scene_config = config.copy()
+    progress = progress if progress is not None else defaultProgress(output)
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1)), initializer=_warmWorker) as executor, progress.task("Batch", len(jobs), 'videos') as task:
+        futures = {executor.submit(_renderJob, scene_config, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                # 工作进程异常退出时，其余任务同样会失败，但仍各自返回结果
+                result = BatchResult(jobs[index], None, 0.0, traceback.format_exc())
+            results[index] = result
+            if output and not result.ok:
+                DEFAULT_OUTPUT_CONSOLE.log(f"[red]Failed to render {result.job.video_name}.mp4.[/]")
+            task.advance()
+
+    if output:
+        succeeded = sum(result.ok for result in results if result is not None)
+        DEFAULT_OUTPUT_CONSOLE.log(f"Rendered {succeeded:,} of {len(jobs):,} videos.")
+    return results # type: ignore[reportReturnType]
+
+__all__ = [
+    "BatchJob",
+    "BatchResult",
+    "loadManifest",
+    "renderBatch"
+]
@@ -0,0 +1,189 @@
+from pathlib import Path
+from typing import IO, Any, Callable
+from tempfile import NamedTemporaryFile
+from itertools import chain
+import hashlib, json, os, shutil
+
+from .config import *
+from .typing import StrPath
+
+class RenderCache:
+    """
+    A content-addressed cache of rendered videos on disk.
+
+    Every video is stored under the digest of everything that influences its frames, so an identical render can
+    be answered with the stored file. Other intermediate results, such as code layouts, are stored the same way
+    with `store` and `load`. The modification time of an entry is refreshed whenever it is used, and the least
+    recently used entries are deleted once the cache grows beyond `max_size` bytes.
+
+    Args:
+        directory (StrPath | None): The cache directory. Defaults to `None`, which uses `CodeVideoRendererCache`
+            in manim's media directory.
+        max_size (int): The maximum total size of the cached videos, in bytes. Defaults to `DEFAULT_RENDER_CACHE_SIZE`.
+    """
+    def __init__(self, directory: StrPath | None = None, max_size: int = DEFAULT_RENDER_CACHE_SIZE):
+        if max_size < 0:
+            raise ValueError("max_size must be greater than or equal to 0")
+        self.directory = Path(directory) if directory is not None else None
+        self.max_size = max_size
+
+    def _directory(self) -> Path:
+        # 延迟到使用时确定目录，使默认目录跟随manim配置的修改
+        if self.directory is None:
+            from manim import config
+            return Path(config.media_dir) / 'CodeVideoRendererCache'
+        return self.directory
+
+    @staticmethod
+    def key(**fields: Any) -> str:
+        """
+        Compute the cache key of a render.
+
+        Args:
+            **fields (Any): JSON serializable values of everything that influences the video.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the fields.
+        """
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Path | None:
+        """
+        Look up a cached video and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Path | None: The cached video, or `None` if there is no entry for `key`.
+        """
+        path = self._directory() / f"{key}.mp4"
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def checkout(self, key: str, directory: StrPath) -> Path | None:
+        """
+        Look up a cached video, mark it as recently used and link it into `directory`.
+
+        The linked file stays readable when the entry is evicted, for example by a concurrent render, until it is
+        deleted together with `directory`. The video is copied where hard links are not supported.
+
+        Args:
+            key (str): The cache key.
+            directory (StrPath): The directory that receives the video, such as the scratch directory of a render.
+
+        Returns:
+            Path | None: The video in `directory`, or `None` if there is no entry for `key`.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        path = Path(directory) / entry.name
+        try:
+            os.link(entry, path)
+        except FileNotFoundError:
+            # 查找后已被淘汰
+            return None
+        except OSError:
+            # 不支持硬链接（如跨文件系统）时复制
+            try:
+                shutil.copyfile(entry, path)
+            except FileNotFoundError:
+                return None
+        return path
+
+    def put(self, key: str, path: StrPath) -> Path:
+        """
+        Store a copy of a video, then evict the least recently used entries that exceed the size limit.
+
+        Args:
+            key (str): The cache key.
+            path (StrPath): The video to store.
+
+        Returns:
+            Path: The cached video.
+        """
+        def write(partial: IO[bytes]) -> None:
+            with open(path, 'rb') as source:
+                shutil.copyfileobj(source, partial)
+        return self._write(f"{key}.mp4", write)
+
+    def load(self, key: str) -> bytes | None:
+        """
+        Read data stored with `store` and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            bytes | None: The data, or `None` if there is no entry for `key`.
+        """
+        path = self._directory() / f"{key}.data"
+        try:
+            os.utime(path)
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, data: bytes) -> Path:
+        """
+        Store data other than a video, then evict the least recently used entries that exceed the size limit.
+
+        Args:
+            key (str): The cache key.
+            data (bytes): The data.
+
+        Returns:
+            Path: The cached file.
+        """
+        return self._write(f"{key}.data", lambda partial: partial.write(data))
+
+    def _write(self, name: str, write: Callable[[IO[bytes]], Any]) -> Path:
+        # 先写入唯一的临时文件再替换，避免其他进程或线程读到不完整的条目
+        directory = self._directory()
+        directory.mkdir(parents=True, exist_ok=True)
+        entry = directory / name
+        with NamedTemporaryFile(dir=directory, prefix=f"{name}.", suffix='.partial', delete=False) as partial:
+            try:
+                write(partial)
+            except BaseException:
+                partial.close()
+                os.unlink(partial.name)
+                raise
+        try:
+            os.replace(partial.name, entry)
+        except BaseException:
+            os.unlink(partial.name)
+            raise
+        self.evict(keep=entry)
+        return entry
+
+    def evict(self, keep: Path | None = None) -> None:
+        """
+        Delete the least recently used entries until the cache fits in `max_size` bytes.
+
+        Args:
+            keep (Path | None): An entry that is never deleted. Defaults to `None`.
+        """
+        entries = []
+        for entry in chain(self._directory().glob('*.mp4'), self._directory().glob('*.data')):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total_size <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            entry.unlink(missing_ok=True)
+            total_size -= size
+
+__all__ = [
+    "RenderCache"
+]
@@ -1,7 +1,7 @@
 from string import digits, ascii_letters, punctuation
 from manim import config
 from rich.console import Console
-import sys
+import sys, os
 
 # 原始标准输出和标准错误流
 ORIGINAL_STDOUT = sys.stdout
@@ -20,11 +20,51 @@ DEFAULT_LINE_BREAK_RUN_TIME = 0.4
 DEFAULT_TAB_WIDTH = 4
 DEFAULT_OUTPUT_CONSOLE = Console(file=ORIGINAL_STDOUT)
 DEFAULT_CURSOR_BLINK_RUN_TIME = 0.5
+DEFAULT_RENDER_ENGINE = 'manim'
+DEFAULT_RASTER_SUPERSAMPLE = 1.0
+DEFAULT_VIEWPORT_CULLING = True
+DEFAULT_FREEZE_LINES = False
+DEFAULT_FROZEN_BLOCK_LINES = 16
+DEFAULT_FROZEN_LAYER_SUPERSAMPLE = 2.0
+DEFAULT_FROZEN_LAYER_CACHE_BYTES = 256 * 1024 ** 2
+DEFAULT_CAMERA_WAVE_AMPLITUDE = 0.025
+DEFAULT_GLOW_MODE = 'stream'
+DEFAULT_GLOW_DOWNSAMPLE = 4
+DEFAULT_GLOW_WORKERS = os.cpu_count() or 1
+DEFAULT_GLOW_CACHE_SIZE = 8
+DEFAULT_RENDER_SEGMENTS = 1
+DEFAULT_RENDER_CACHE_SIZE = 2 * 1024 ** 3
+DEFAULT_CODE_LAYOUT_CACHE_GLYPHS = 200_000
+DEFAULT_LAZY_LAYOUT = False
+DEFAULT_LAZY_CHUNK_LINES = 32
+DEFAULT_INCREMENTAL_RENDER = False
+DEFAULT_INCREMENTAL_CHUNK_LINES = 20
+DEFAULT_BATCH_WORKERS = os.cpu_count() or 1
+DEFAULT_FRAME_BUFFER_SIZE = 8
+DEFAULT_RENDER_QUALITY = 'final'
+DEFAULT_ENCODER_CODEC = 'libx264'
+DEFAULT_ENCODER_PRESET = 'medium'
+DEFAULT_ENCODER_CRF = 23
+DEFAULT_ENCODER_PIXEL_FORMAT = 'yuv420p'
+DEFAULT_ENCODER_THREADS = 0
+DEFAULT_ENCODER_AUDIO = False
+DEFAULT_PROGRESS_RATE = 4
 
 # 其他设置
 CODE_OFFSET = 0.08
 NOT_AVAILABLE_CHARACTERS = '\r\v\f'
 OCCUPY_CHARACTER = '('
+RASTER_MARGIN = 0.05
+GLYPH_TOLERANCE = 1e-9
+OFFSET_CHARACTERS = frozenset("acegmnopqrsuvwxyz+,-.:;<=>_~ ")
+TYPING_PLAN_FORMAT = 1
+
+# 渲染质量预设：临时覆盖的manim配置，未指定发光模式时使用的发光模式（None 表示使用默认值），以及未指定编码设置时的编码预设
+QUALITY_PRESETS = {
+    'draft': {'config': {'pixel_width': 854, 'pixel_height': 480, 'frame_rate': 15}, 'glow_mode': 'none', 'encoder': {'preset': 'ultrafast'}},
+    'preview': {'config': {'pixel_width': 1280, 'pixel_height': 720, 'frame_rate': 30}, 'glow_mode': 'stream', 'encoder': {'preset': 'veryfast'}},
+    'final': {'config': {}, 'glow_mode': None, 'encoder': {}}
+}
 
 __all__ = [
     "ORIGINAL_STDOUT",
@@ -41,7 +81,41 @@ __all__ = [
     "DEFAULT_TAB_WIDTH",
     "DEFAULT_OUTPUT_CONSOLE",
     "DEFAULT_CURSOR_BLINK_RUN_TIME",
+    "DEFAULT_RENDER_ENGINE",
+    "DEFAULT_RASTER_SUPERSAMPLE",
+    "DEFAULT_VIEWPORT_CULLING",
+    "DEFAULT_FREEZE_LINES",
+    "DEFAULT_FROZEN_BLOCK_LINES",
+    "DEFAULT_FROZEN_LAYER_SUPERSAMPLE",
+    "DEFAULT_FROZEN_LAYER_CACHE_BYTES",
+    "DEFAULT_CAMERA_WAVE_AMPLITUDE",
+    "DEFAULT_GLOW_MODE",
+    "DEFAULT_GLOW_DOWNSAMPLE",
+    "DEFAULT_GLOW_WORKERS",
+    "DEFAULT_GLOW_CACHE_SIZE",
+    "DEFAULT_RENDER_SEGMENTS",
+    "DEFAULT_RENDER_CACHE_SIZE",
+    "DEFAULT_CODE_LAYOUT_CACHE_GLYPHS",
+    "DEFAULT_LAZY_LAYOUT",
+    "DEFAULT_LAZY_CHUNK_LINES",
+    "DEFAULT_INCREMENTAL_RENDER",
+    "DEFAULT_INCREMENTAL_CHUNK_LINES",
+    "DEFAULT_BATCH_WORKERS",
+    "DEFAULT_FRAME_BUFFER_SIZE",
+    "DEFAULT_RENDER_QUALITY",
+    "DEFAULT_ENCODER_CODEC",
+    "DEFAULT_ENCODER_PRESET",
+    "DEFAULT_ENCODER_CRF",
+    "DEFAULT_ENCODER_PIXEL_FORMAT",
+    "DEFAULT_ENCODER_THREADS",
+    "DEFAULT_ENCODER_AUDIO",
+    "DEFAULT_PROGRESS_RATE",
+    "QUALITY_PRESETS",
     "CODE_OFFSET",
     "NOT_AVAILABLE_CHARACTERS",
-    "OCCUPY_CHARACTER"
+    "OCCUPY_CHARACTER",
+    "RASTER_MARGIN",
+    "GLYPH_TOLERANCE",
+    "OFFSET_CHARACTERS",
+    "TYPING_PLAN_FORMAT"
 ]
\ No newline at end of file
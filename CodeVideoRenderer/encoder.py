@@ -0,0 +1,290 @@
+from moviepy.config import FFMPEG_BINARY
+from dataclasses import dataclass
+from tempfile import TemporaryFile
+from contextlib import suppress
+from typing import Any
+from queue import Queue
+from threading import Thread
+from manim import config, __version__ as MANIM_VERSION
+import numpy as np
+import subprocess
+
+from .config import *
+from .typing import StrPath, BinaryOutput
+
+@dataclass(frozen=True)
+class EncoderConfig:
+    """
+    The ffmpeg settings used to encode videos.
+
+    The preset trades encoding speed against file size at the same quality, from `'ultrafast'` (for tests and
+    CI) to `'veryslow'` (for publishing). The quality is set either by `crf` or by `bitrate`.
+
+    Attributes:
+        codec (str): The ffmpeg video encoder. Defaults to `DEFAULT_ENCODER_CODEC`.
+        preset (str | None): The encoder preset, or `None` to use the encoder's default. Defaults to `DEFAULT_ENCODER_PRESET`.
+        crf (int | None): The constant rate factor, ignored when `bitrate` is set. Defaults to `DEFAULT_ENCODER_CRF`.
+        bitrate (str | None): The target video bitrate, such as `'4M'`. Defaults to `None`.
+        pixel_format (str): The pixel format of the encoded video. Defaults to `DEFAULT_ENCODER_PIXEL_FORMAT`.
+        threads (int): The number of encoder threads, 0 lets ffmpeg decide. Defaults to `DEFAULT_ENCODER_THREADS`.
+        audio (bool): Whether the audio stream of the source video is kept when a video is encoded again. Defaults to `DEFAULT_ENCODER_AUDIO`.
+        extra_args (tuple[str, ...]): Further ffmpeg output options, added after the others. Defaults to `()`.
+    """
+    codec: str = DEFAULT_ENCODER_CODEC
+    preset: str | None = DEFAULT_ENCODER_PRESET
+    crf: int | None = DEFAULT_ENCODER_CRF
+    bitrate: str | None = None
+    pixel_format: str = DEFAULT_ENCODER_PIXEL_FORMAT
+    threads: int = DEFAULT_ENCODER_THREADS
+    audio: bool = DEFAULT_ENCODER_AUDIO
+    extra_args: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        if self.crf is not None and self.crf < 0:
+            raise ValueError("crf must be greater than or equal to 0")
+        if self.threads < 0:
+            raise ValueError("threads must be greater than or equal to 0")
+
+    def arguments(self) -> list[str]:
+        """
+        Build the ffmpeg output options of the video stream.
+
+        Returns:
+            list[str]: The options, to be placed before the output file.
+        """
+        arguments = ['-c:v', self.codec]
+        if self.preset is not None:
+            arguments += ['-preset', self.preset]
+        if self.bitrate is not None:
+            arguments += ['-b:v', self.bitrate]
+        elif self.crf is not None:
+            arguments += ['-crf', str(self.crf)]
+        arguments += ['-pix_fmt', self.pixel_format, '-threads', str(self.threads), *self.extra_args]
+        return arguments
+
+    def fields(self) -> dict[str, Any]:
+        """The settings as JSON serializable values, for the render cache keys."""
+        return {
+            'codec': self.codec,
+            'preset': self.preset,
+            'crf': self.crf,
+            'bitrate': self.bitrate,
+            'pixel_format': self.pixel_format,
+            'audio': self.audio,
+            'extra_args': list(self.extra_args)
+        }
+
+class FFmpegEncoder:
+    """
+    Encode raw frames into a video file by piping them to an ffmpeg process.
+
+    The frames are written to the standard input of ffmpeg as they are, without any conversion in Python. A
+    binary stream receives a fragmented MP4 while ffmpeg produces it, so no file is written. The encoder can be
+    used as a context manager, which closes it when the context exits.
+
+    Args:
+        path (StrPath | BinaryOutput): The video file to write, or a binary stream to write the video to.
+        size (tuple[int, int]): The width and height of the frames.
+        fps (float): The frame rate.
+        settings (EncoderConfig | None): The encoder settings. Defaults to `None`, which uses `EncoderConfig()`.
+        input_format (str): The pixel format of the frames, `'rgb24'` for RGB and `'rgba'` for RGBA frames. Defaults to `'rgb24'`.
+        audio_path (StrPath | None): A video whose audio stream (if any) is copied to the output when `settings.audio` is set. Defaults to `None`.
+    """
+    def __init__(self, path: StrPath | BinaryOutput, size: tuple[int, int], fps: float, settings: EncoderConfig | None = None, input_format: str = 'rgb24', audio_path: StrPath | None = None):
+        self.settings = settings or EncoderConfig()
+        self.command = [
+            FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', input_format, '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', '-'
+        ]
+        if self.settings.audio and audio_path is not None:
+            self.command += ['-i', str(audio_path), '-map', '0:v', '-map', '1:a?', '-c:a', 'copy']
+        else:
+            self.command.append('-an')
+        self.command += self.settings.arguments()
+        stream = path if isinstance(path, BinaryOutput) else None
+        if stream is not None:
+            # 分片MP4不需要在写完后回填文件头，可以边生成边写入不可定位的流
+            self.command += ['-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', 'pipe:1']
+        else:
+            self.command.append(str(path))
+        # 错误信息写入临时文件，避免ffmpeg在管道缓冲区写满后阻塞
+        self._errors = TemporaryFile()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE if stream is not None else subprocess.DEVNULL, stderr=self._errors)
+        self.frame_count = 0
+        # 输出到流时由线程转发ffmpeg的输出，与写入帧同时进行
+        self._output_error: BaseException | None = None
+        self._output_thread = Thread(target=self._forward, args=(stream,), daemon=True) if stream is not None else None
+        if self._output_thread is not None:
+            self._output_thread.start()
+
+    def _forward(self, stream: BinaryOutput) -> None:
+        assert self.process.stdout is not None
+        try:
+            while chunk := self.process.stdout.read(1 << 16):
+                stream.write(chunk)
+        except BaseException as error:
+            # 写入流失败时结束ffmpeg，关闭时重新抛出
+            self._output_error = error
+            self.process.kill()
+
+    def write(self, frame: np.ndarray, num_frames: int = 1) -> None:
+        """
+        Write a frame to the video.
+
+        Args:
+            frame (np.ndarray): A uint8 frame of shape `(height, width, channels)` matching `size` and `input_format`.
+            num_frames (int): The number of times the frame is written. Defaults to 1.
+
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg has exited.
+        """
+        assert self.process.stdin is not None
+        data = np.ascontiguousarray(frame, dtype=np.uint8).data.cast('B')
+        try:
+            for _ in range(num_frames):
+                self.process.stdin.write(data)
+        except BrokenPipeError:
+            # ffmpeg已经退出，关闭时会报告它的错误信息
+            self.close()
+        self.frame_count += num_frames
+
+    def close(self) -> None:
+        """
+        Finish the video and wait for ffmpeg to exit. Closing a closed encoder does nothing.
+
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg fails.
+            Exception: Whatever writing to the output stream raised.
+        """
+        if self._errors.closed:
+            return
+        assert self.process.stdin is not None
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        if self._output_thread is not None:
+            self._output_thread.join()
+            assert self.process.stdout is not None
+            self.process.stdout.close()
+        self._errors.seek(0)
+        stderr = self._errors.read().decode('utf-8', errors='replace')
+        self._errors.close()
+        if self._output_error is not None:
+            raise self._output_error
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, self.command, stderr=stderr)
+
+    def __enter__(self) -> "FFmpegEncoder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # 出错时不等待编码完成，也不用ffmpeg的退出状态掩盖原来的异常
+        self.process.kill()
+        with suppress(Exception):
+            self.close()
+
+def checkFileWriter() -> None:
+    """
+    Make sure the installed manim has the `SceneFileWriter` that `attachEncoder` and `CameraFollowCursorCV.frames`
+    are written against.
+
+    Both replace private methods of the file writer of manim 0.19 (`open_partial_movie_stream`,
+    `encode_and_write_frame`, `write_frame` and the writer thread), whose signatures changed in later versions.
+
+    Raises:
+        RuntimeError: If the installed manim is not version 0.19.
+    """
+    if MANIM_VERSION.split('.')[:2] != ['0', '19']:
+        raise RuntimeError(f"CodeVideoRenderer requires manim 0.19 (manim>=0.19.1,<0.20), but manim {MANIM_VERSION} is installed")
+
+def attachEncoder(file_writer, settings: EncoderConfig, stream: BinaryOutput | None = None) -> None:
+    """
+    Make a manim `SceneFileWriter` encode the whole scene with a single `FFmpegEncoder` instead of PyAV.
+
+    manim encodes every animation into a partial movie file and concatenates them when the scene is finished.
+    Here the frames of all animations are piped to one ffmpeg process that writes the scene's movie file
+    directly, so no process is started per animation and no partial movie files are written. The frames still
+    pass through the writer thread of manim, so hooks on `encode_and_write_frame` keep working. Sections and
+    sounds are not supported.
+
+    Args:
+        file_writer (SceneFileWriter): The file writer of a scene, before the scene is rendered.
+        settings (EncoderConfig): The encoder settings.
+        stream (BinaryOutput | None): A binary stream that receives the video as a fragmented MP4 instead of the movie file. Defaults to `None`.
+
+    Raises:
+        RuntimeError: If the installed manim is not version 0.19, see `checkFileWriter`.
+        ValueError: If manim is configured for transparent or non-MP4 output, which the encoder does not write.
+    """
+    checkFileWriter()
+    if config.transparent or config.format not in (None, 'mp4'):
+        raise ValueError("CodeVideoRenderer encodes opaque MP4 videos; transparent output and formats other than MP4 (config.transparent, config.format) are not supported")
+    file_writer.encoder = None
+    file_writer.encoder_error = None
+
+    def open_partial_movie_stream(file_path: StrPath | None = None) -> None:
+        if file_writer.encoder is not None:
+            return
+        # manim的帧为RGBA
+        file_writer.encoder = FFmpegEncoder(stream if stream is not None else file_writer.movie_file_path, (config.pixel_width, config.pixel_height), config.frame_rate, settings, input_format='rgba')
+        file_writer.queue = Queue()
+        file_writer.writer_thread = Thread(target=file_writer.listen_and_write, args=())
+        file_writer.writer_thread.start()
+
+    def encode_and_write_frame(frame: np.ndarray, num_frames: int) -> None:
+        # 写入线程中的异常在结束场景时重新抛出
+        if file_writer.encoder_error is not None:
+            return
+        try:
+            file_writer.encoder.write(frame, num_frames)
+        except Exception as error:
+            file_writer.encoder_error = error
+
+    def close_partial_movie_stream() -> None:
+        # 各动画的帧写入同一个视频，结束场景时才关闭
+        pass
+
+    def combine_to_movie() -> None:
+        if file_writer.encoder is None:
+            return
+        file_writer.queue.put((-1, None))
+        file_writer.writer_thread.join()
+        if file_writer.encoder_error is not None:
+            raise file_writer.encoder_error
+        file_writer.encoder.close()
+
+    file_writer.open_partial_movie_stream = open_partial_movie_stream
+    file_writer.encode_and_write_frame = encode_and_write_frame
+    file_writer.close_partial_movie_stream = close_partial_movie_stream
+    file_writer.combine_to_movie = combine_to_movie
+
+def detachEncoder(file_writer) -> None:
+    """
+    Undo `attachEncoder`. If the scene did not finish, the writer thread is stopped and the unfinished video is abandoned.
+
+    Args:
+        file_writer (SceneFileWriter): The file writer passed to `attachEncoder`.
+    """
+    encoder: FFmpegEncoder | None = file_writer.__dict__.pop('encoder', None)
+    if encoder is not None and file_writer.writer_thread.is_alive():
+        file_writer.queue.put((-1, None))
+        file_writer.writer_thread.join()
+    if encoder is not None:
+        encoder.process.kill()
+        with suppress(Exception):
+            encoder.close()
+    for name in ('encoder_error', 'open_partial_movie_stream', 'encode_and_write_frame', 'close_partial_movie_stream', 'combine_to_movie'):
+        file_writer.__dict__.pop(name, None)
+
+__all__ = [
+    "EncoderConfig",
+    "FFmpegEncoder",
+    "checkFileWriter",
+    "attachEncoder",
+    "detachEncoder"
+]
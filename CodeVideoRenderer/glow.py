@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from typing import Callable
+from PIL import Image
+import numpy as np
+import hashlib
+
+from .config import *
+
+def _upsample(source: np.ndarray, target: np.ndarray, padded: np.ndarray, scratch: np.ndarray, factor: int, add: bool = False) -> None:
+    """Bilinearly upsample `source` along its first axis into `target` (or add it to `target`), aligning pixel centers."""
+    count = source.shape[0]
+    padded[1:-1] = source
+    padded[0] = source[0]
+    padded[-1] = source[-1]
+    phases = target.reshape(count, factor, *source.shape[1:])
+    for phase in range(factor):
+        # 每个相位对应一组固定的插值权重，只需对连续的切片做运算
+        offset = (phase + 0.5) / factor - 0.5
+        neighbour = padded[0:-2] if offset < 0 else padded[2:]
+        if add:
+            np.multiply(padded[1:-1], np.float32(1 - abs(offset)), out=scratch)
+            phases[:, phase] += scratch
+        else:
+            np.multiply(padded[1:-1], np.float32(1 - abs(offset)), out=phases[:, phase])
+        np.multiply(neighbour, np.float32(abs(offset)), out=scratch)
+        phases[:, phase] += scratch
+
+def _downsample(source: np.ndarray, target: np.ndarray, factor: int) -> None:
+    """Sum blocks of `factor` rows of `source` along its first axis into `target`."""
+    blocks = source.reshape(target.shape[0], factor, *source.shape[1:])
+    np.copyto(target, blocks[:, 0])
+    for row in range(1, factor):
+        target += blocks[:, row]
+
+def _boxRadius(sigma: float, passes: int) -> float:
+    """The fractional box radius whose `passes` repeated box blurs approximate a Gaussian, computed like PIL's `GaussianBlur`."""
+    variance = sigma ** 2 / passes
+    whole = np.floor((np.sqrt(12 * variance + 1) - 1) / 2)
+    fraction = (2 * whole + 1) * (whole * (whole + 1) - 3 * variance) / (6 * (variance - (whole + 1) ** 2))
+    return float(whole + fraction)
+
+def _boxBlur(values: np.ndarray, padded: np.ndarray, sums: np.ndarray, scratch: np.ndarray, radius: float, edges: tuple[np.ndarray, np.ndarray] | None = None) -> None:
+    """
+    Blur `values` in place along its first axis with a box of fractional `radius` from running sums, repeating the
+    edge pixels like PIL's `BoxBlur`, or the given `edges` (the values before the first and after the last item).
+    """
+    count = values.shape[0]
+    whole = int(radius)
+    fraction = np.float32(radius - whole)
+    first, last = edges if edges is not None else (values[0], values[-1])
+    # 两端各复制 whole+2 个边缘值，分数半径的边缘权重落在窗口外的第一个值上
+    padded[:whole + 2] = first
+    padded[whole + 2:whole + 2 + count] = values
+    padded[whole + 2 + count:] = last
+    sums[0] = 0
+    np.cumsum(padded, axis=0, out=sums[1:])
+    width = 2 * whole + 3
+    # 半径 whole 的窗口和与半径 whole+1 的窗口和按分数部分插值
+    np.subtract(sums[width:width + count], sums[2:2 + count], out=values)
+    np.subtract(sums[width + 1:width + 1 + count], sums[1:1 + count], out=scratch)
+    scratch -= values
+    scratch *= fraction
+    values += scratch
+    values *= np.float32(1 / (2 * radius + 1))
+
+def _boxBuffers(count: int, radius: float, shape: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Allocate the buffers of `_boxBlur` for `count` items of `shape` along the first axis."""
+    margin = 2 * int(radius) + 4
+    return (
+        np.empty((count + margin, *shape), dtype=np.float32),
+        np.empty((count + margin + 1, *shape), dtype=np.float32),
+        np.empty((count, *shape), dtype=np.float32)
+    )
+
+class GlowKernel:
+    """
+    A NumPy implementation of the glow effect of `frameGlow`.
+
+    The frame is brightened through a lookup table, downsampled by `downsample` with area averaging, blurred at the
+    low resolution with three running-sum box blurs per direction (the approximation of a Gaussian that PIL uses),
+    color corrected and bilinearly upsampled before it is blended with the frame. Like PIL, the blur repeats the
+    edge pixels of the full resolution frame, which are blurred separately for that. Only the color channels are
+    processed; the alpha channel of RGBA frames is passed through unchanged. Every step runs on float32 buffers
+    that are allocated once per frame size and reused, so a kernel must not be shared between threads.
+
+    Args:
+        brightness (float): The brightness factor of the frame. Defaults to 1.2.
+        radius (float): The standard deviation of the Gaussian blur of the glow layer, in pixels. Defaults to 10.
+        glow_brightness (float): The brightness factor of the glow layer. Defaults to 1.5.
+        glow_saturation (float): The saturation factor of the glow layer. Defaults to 1.2.
+        blend (float): The weight of the frame when it is blended with the glow layer. Defaults to 0.4.
+        downsample (int): The factor the frame is downsampled by before blurring. Defaults to `DEFAULT_GLOW_DOWNSAMPLE`.
+    """
+    passes = 3
+
+    def __init__(
+        self,
+        brightness: float = 1.2,
+        radius: float = 10,
+        glow_brightness: float = 1.5,
+        glow_saturation: float = 1.2,
+        blend: float = 0.4,
+        downsample: int = DEFAULT_GLOW_DOWNSAMPLE,
+    ):
+        if downsample < 1:
+            raise ValueError("downsample must be greater than or equal to 1")
+        self.glow_brightness = np.float32(glow_brightness)
+        self.glow_saturation = np.float32(glow_saturation)
+        self.blend = np.float32(blend)
+        self.downsample = downsample
+
+        # 提亮与PIL一致：截断到整数并限制在 255 以内，三个颜色通道共用一张查找表
+        self.brightness_table = np.minimum(np.floor(np.arange(256) * brightness), 255).astype(np.uint8).tolist() * 3
+
+        # 降采样（块平均）与双线性升采样本身带来的模糊从目标方差中扣除
+        offsets = np.abs((np.arange(downsample) + 0.5) / downsample - 0.5)
+        variance = radius ** 2 - (downsample ** 2 - 1) / 12 - float(np.mean(offsets * (1 - offsets))) * downsample ** 2
+        sigma = max(np.sqrt(max(variance, 0)) / downsample, 1e-3)
+        self.box_radius = _boxRadius(sigma, self.passes)
+        self.edge_radius = _boxRadius(radius, self.passes)
+
+        # 饱和度调整中需要减去的亮度分量
+        self.luma = np.array([0.299, 0.587, 0.114], dtype=np.float32) * (self.glow_saturation - 1)
+
+        self._key: tuple[int, int] | None = None
+
+    def _allocate(self, height: int, width: int) -> None:
+        f = self.downsample
+        low_height, low_width = -(-height // f), -(-width // f)
+
+        self._key = (height, width)
+        # 低分辨率的数据以转置（列优先）的形式存放，使水平方向的运算同样作用在第一个轴上
+        self._bright = np.empty((low_height * f, low_width * f, 3), dtype=np.float32)
+        self._rows = np.empty((low_height, low_width * f, 3), dtype=np.float32)
+        self._columns = np.empty((low_width * f, low_height, 3), dtype=np.float32)
+        self._low = np.empty((low_width, low_height, 3), dtype=np.float32)
+        self._low_rows = np.empty((low_height, low_width, 3), dtype=np.float32)
+        self._luma = np.empty((low_height, low_width), dtype=np.float32)
+        self._wide_blur = _boxBuffers(low_width, self.box_radius, (low_height, 3))
+        self._tall_blur = _boxBuffers(low_height, self.box_radius, (low_width, 3))
+        # 全分辨率的首尾两行，水平模糊后作为垂直模糊的边缘值
+        self._edge_rows = np.empty((low_width * f, 2, 3), dtype=np.float32)
+        self._edge_blur = _boxBuffers(low_width * f, self.edge_radius, (2, 3))
+        self._wide_padded = np.empty((low_width + 2, low_height, 3), dtype=np.float32)
+        self._wide_scratch = np.empty((low_width, low_height, 3), dtype=np.float32)
+        self._tall_padded = np.empty((low_height + 2, low_width * f, 3), dtype=np.float32)
+        self._tall_scratch = np.empty((low_height, low_width * f, 3), dtype=np.float32)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Add the glow effect to a frame.
+
+        Args:
+            frame (np.ndarray): An RGB or RGBA uint8 frame. The alpha channel is passed through unchanged.
+
+        Returns:
+            np.ndarray: The glowed frame, with the same shape as `frame`.
+        """
+        height, width, channels = frame.shape
+        if self._key != (height, width):
+            self._allocate(height, width)
+        f = self.downsample
+
+        # 去掉 alpha 通道后查表提亮，不足整块的部分复制边缘像素
+        mode = 'RGBA' if channels == 4 else 'RGB'
+        image = Image.frombuffer(mode, (width, height), np.ascontiguousarray(frame, dtype=np.uint8), 'raw', mode, 0, 1)
+        bright = self._bright
+        view = bright[:height, :width]
+        np.copyto(view, np.asarray(image.convert('RGB').point(self.brightness_table)))
+        bright[height:, :width] = bright[height - 1:height, :width]
+        bright[:, width:] = bright[:, width - 1:width]
+
+        # 先按行、转置后再按列求块内和
+        _downsample(bright, self._rows, f)
+        np.copyto(self._columns, self._rows.transpose(1, 0, 2))
+        low = self._low
+        _downsample(self._columns, low, f)
+
+        # PIL在全分辨率下复制边缘像素：第一次模糊以全分辨率的边缘列（行）为边缘值，之后的模糊结果已经平滑，直接复制低分辨率的边缘
+        edges = (self._rows[:, 0] * f, self._rows[:, width - 1] * f)
+        for index in range(self.passes):
+            _boxBlur(low, *self._wide_blur, self.box_radius, edges if index == 0 else None)
+        edge_rows = self._edge_rows
+        np.copyto(edge_rows[:, 0], bright[0])
+        np.copyto(edge_rows[:, 1], bright[height - 1])
+        for _ in range(self.passes):
+            _boxBlur(edge_rows, *self._edge_blur, self.edge_radius)
+        edge_sums = edge_rows.reshape(-1, f, 2, 3).sum(axis=1) * f
+        low_rows = self._low_rows
+        np.copyto(low_rows, low.transpose(1, 0, 2))
+        for index in range(self.passes):
+            _boxBlur(low_rows, *self._tall_blur, self.box_radius, (edge_sums[:, 0], edge_sums[:, 1]) if index == 0 else None)
+
+        # 调整光晕层的亮度与饱和度：c' = s*c - (s-1)*L，块面积的倒数一并乘入
+        low_rows *= self.glow_brightness / (f * f)
+        np.minimum(low_rows, 255, out=low_rows)
+        luma = self._luma
+        np.matmul(low_rows, self.luma, out=luma)
+        low_rows *= self.glow_saturation
+        low_rows -= luma[..., None]
+        np.clip(low_rows, 0, 255, out=low_rows)
+        low_rows *= 1 - self.blend
+        np.copyto(low, low_rows.transpose(1, 0, 2))
+
+        # 升采样：先在转置后的数据上处理水平方向，再转置回来处理垂直方向，并直接叠加到乘以混合权重后的原图上
+        _upsample(low, self._columns, self._wide_padded, self._wide_scratch, f)
+        np.copyto(self._rows, self._columns.transpose(1, 0, 2))
+        bright *= self.blend
+        _upsample(self._rows, bright, self._tall_padded, self._tall_scratch, f, add=True)
+
+        result = np.empty_like(frame, dtype=np.uint8)
+        np.copyto(result[..., :3], view, casting='unsafe')
+        if channels == 4:
+            result[..., 3] = frame[..., 3]
+        return result
+
+class GlowCache:
+    """
+    Reuse the glow of frames that are identical to a recently processed frame.
+
+    Frames are identified by a BLAKE2b digest of their pixels, and the most recently used `max_size` results are
+    kept. The cached results are read-only.
+
+    Args:
+        glow (Callable[[np.ndarray], np.ndarray]): The function that adds the glow effect to a frame.
+        max_size (int): The maximum number of cached frames. Defaults to `DEFAULT_GLOW_CACHE_SIZE`.
+    """
+    def __init__(self, glow: Callable[[np.ndarray], np.ndarray], max_size: int = DEFAULT_GLOW_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("max_size must be greater than or equal to 1")
+        self.glow = glow
+        self.max_size = max_size
+        self.cache: OrderedDict[tuple[bytes, tuple[int, ...]], np.ndarray] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Add the glow effect to a frame, or return the cached result of an identical frame.
+
+        Args:
+            frame (np.ndarray): The frame.
+
+        Returns:
+            np.ndarray: The glowed frame.
+        """
+        frame = np.ascontiguousarray(frame)
+        key = (hashlib.blake2b(frame.data, digest_size=16).digest(), frame.shape)
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self.glow(frame)
+        result.setflags(write=False)
+        self.cache[key] = result
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return result
+
+__all__ = [
+    "GlowKernel",
+    "GlowCache"
+]
@@ -0,0 +1,120 @@
+from manim import Mobject, RendererType, config
+from manim.mobject.svg.svg_mobject import VMobjectFromSVGPath
+import numpy as np
+
+from .config import *
+
+class GlyphShape:
+    """
+    A read-only glyph outline, relative to its first point, that is shared by every glyph with the same outline.
+
+    Copying a shape returns the shape itself, so copies of a code layout keep sharing it.
+
+    Args:
+        points (np.ndarray): The points of the outline, relative to its first point.
+    """
+    __slots__ = ('points',)
+
+    def __init__(self, points: np.ndarray):
+        points = np.array(points, dtype=float)
+        points.setflags(write=False)
+        self.points = points
+
+    def __copy__(self) -> "GlyphShape":
+        return self
+
+    def __deepcopy__(self, memo) -> "GlyphShape":
+        return self
+
+    def __reduce__(self):
+        return GlyphShape, (self.points,)
+
+class GlyphMobject(VMobjectFromSVGPath):
+    """
+    A glyph of a code layout that stores a shared `GlyphShape` and its offset instead of its own points.
+
+    The first read of `points` materializes them at the current offset. Later reads return the same array, and
+    in-place changes to it are kept like those to the points of any other mobject. Assigning a translation of the
+    shape (as `shift` and `move_to` do) only changes the offset and releases the materialized points, so glyphs
+    that are moved but not drawn keep no points of their own. Assigning anything else gives the glyph its own
+    points, which it keeps from then on. Glyphs are created by `shareGlyphs`.
+    """
+    _shape: GlyphShape | None = None
+    _offset: np.ndarray = np.zeros(3)
+    _points: np.ndarray | None = None
+
+    @property
+    def points(self) -> np.ndarray: # type: ignore[override]
+        points = self._points
+        if points is None:
+            # 只在第一次读取时分配，之后的读取与原地修改都作用于同一份点
+            shape = self._shape
+            points = self._points = shape.points + self._offset if shape is not None else np.zeros((0, 3))
+        return points
+
+    @points.setter
+    def points(self, points: np.ndarray) -> None:
+        shape = self._shape
+        if shape is not None and np.shape(points) == shape.points.shape:
+            offset = np.array(points[0], dtype=float)
+            if np.abs(points - offset - shape.points).max() <= GLYPH_TOLERANCE:
+                self._offset = offset
+                self._points = None
+                return
+        self._shape = None
+        self._points = points
+
+    def _materialize(self) -> None:
+        # 原地修改点之前先取得自己的点，之后不再按形状与偏移还原
+        self._points = self.points
+        self._shape = None
+
+    def set_anchors_and_handles(self, *args, **kwargs):
+        self._materialize()
+        return super().set_anchors_and_handles(*args, **kwargs)
+
+    def pointwise_become_partial(self, *args, **kwargs):
+        self._materialize()
+        return super().pointwise_become_partial(*args, **kwargs)
+
+def shareGlyphs(mobject: Mobject) -> tuple[int, int]:
+    """
+    Make the glyphs in a mobject share the points of identical outlines, see `GlyphMobject`.
+
+    Every character of a code layout is a separate mobject, and most of them repeat the outline of another
+    character at another position. The outlines are compared up to `GLYPH_TOLERANCE`. The SVG paths the glyphs
+    were parsed from are dropped. Only the Cairo renderer is supported; with OpenGL nothing is changed.
+
+    Args:
+        mobject (Mobject): The mobject, usually the code and line numbers of a code layout.
+
+    Returns:
+        tuple[int, int]: The number of glyphs and the number of distinct outlines they share.
+    """
+    if config.renderer != RendererType.CAIRO:
+        return 0, 0
+    shapes: dict[bytes, GlyphShape] = {}
+    glyphs = 0
+    for glyph in mobject.get_family():
+        # 只转换普通的字形，已转换或其他类型的对象保持不变
+        if type(glyph) is not VMobjectFromSVGPath or len(glyph.points) == 0:
+            continue
+        points = np.asarray(glyph.points, dtype=float)
+        offset = points[0].copy()
+        relative = points - offset
+        key = np.round(relative / GLYPH_TOLERANCE).astype(np.int64).tobytes()
+        shape = shapes.get(key)
+        if shape is None:
+            shape = shapes[key] = GlyphShape(relative)
+        state = vars(glyph)
+        del state['points']
+        glyph.__class__ = GlyphMobject
+        state.update(path_obj=None, _shape=shape, _offset=offset)
+        glyphs += 1
+    return glyphs, len(shapes)
+
+__all__ = [
+    "GlyphShape",
+    "GlyphMobject",
+    "shareGlyphs"
+]
@@ -0,0 +1,262 @@
+from manim import Mobject, Group, Code, config, GREY
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Literal
+import numpy as np
+import hashlib, pickle
+
+from .config import *
+from .typing import *
+from .utils import codeFont, _CODE_FONT_PATH
+from .cache import RenderCache
+from .glyphs import shareGlyphs
+
+CODE_LAYOUT_CACHE: OrderedDict[str, tuple[Mobject, Mobject]] = OrderedDict()
+"""
+Line numbers and code mobjects built by `codeLayout` after `keepCodeLayouts`, stored by layout key and evicted in
+LRU order once they hold more than `DEFAULT_CODE_LAYOUT_CACHE_GLYPHS` glyphs.
+"""
+_keep_layouts = False
+
+def keepCodeLayouts() -> None:
+    """
+    Keep the layouts built by `codeLayout` in `CODE_LAYOUT_CACHE` for the rest of the process, so that later
+    renders of the same code in this process copy them instead of building or loading them again. The worker
+    processes of `renderBatch` do this.
+    """
+    global _keep_layouts
+    _keep_layouts = True
+
+def _glyphCount(layout: tuple[Mobject, Mobject]) -> int:
+    # 行号与代码行的字形总数
+    return sum(len(line.submobjects) for part in layout for line in part.submobjects)
+
+@lru_cache(maxsize=None)
+def _fontDigest() -> str:
+    with open(_CODE_FONT_PATH, 'rb') as font:
+        return hashlib.sha256(font.read()).hexdigest()
+
+def codeLayoutKey(code_string: str, language: PygmentsLanguage, formatter_style: PygmentsFormatterStyle, line_spacing: float | int, line_numbers_from: int = 1) -> str:
+    """
+    Compute the key of a code layout, from everything that influences the glyphs and their positions.
+
+    Args:
+        code_string (str): The code, as passed to manim's `Code`.
+        language (PygmentsLanguage): The programming language of the code.
+        formatter_style (PygmentsFormatterStyle): The style for syntax highlighting.
+        line_spacing (float | int): The line spacing.
+        line_numbers_from (int): The number of the first line. Defaults to 1.
+
+    Returns:
+        str: The layout key.
+    """
+    import manim
+    from . import __version__
+    return RenderCache.key(
+        kind='code_layout',
+        code=code_string,
+        language=language,
+        formatter_style=formatter_style,
+        line_spacing=line_spacing,
+        line_numbers_from=line_numbers_from,
+        font=_fontDigest(),
+        renderer=str(config.renderer),
+        manim=manim.__version__,
+        version=__version__
+    )
+
+def codeLayout(code_string: str, language: PygmentsLanguage, formatter_style: PygmentsFormatterStyle, line_spacing: float | int, cache: RenderCache | None = None, line_numbers_from: int = 1, memory: bool = True) -> tuple[Mobject, Mobject, Literal['memory', 'disk', 'built']]:
+    """
+    Build the line numbers and code mobjects of manim's `Code`, or copy them from a cache.
+
+    Highlighting the code and laying out every line with Pango is the slowest part of preparing a scene, and
+    depends only on the arguments. If `cache` is given, built layouts are pickled into it so that other processes
+    and later runs can load them. After `keepCodeLayouts` they are also kept in `CODE_LAYOUT_CACHE`. The code
+    font is only registered when a layout is built. The glyphs of built layouts share their outlines, see
+    `shareGlyphs`.
+
+    Args:
+        code_string (str): The code, as passed to manim's `Code`.
+        language (PygmentsLanguage): The programming language of the code.
+        formatter_style (PygmentsFormatterStyle): The style for syntax highlighting.
+        line_spacing (float | int): The line spacing.
+        cache (RenderCache | None): The cache the layout is stored in and loaded from. Only use caches written by
+            trusted processes, since loading an entry unpickles it. Defaults to `None`.
+        line_numbers_from (int): The number of the first line. Defaults to 1.
+        memory (bool): Whether the layout may be kept in `CODE_LAYOUT_CACHE`. Defaults to True.
+
+    Returns:
+        tuple[Mobject, Mobject, Literal['memory', 'disk', 'built']]: Copies of the line numbers and code mobjects
+            that the caller may modify, and where they came from.
+    """
+    key = codeLayoutKey(code_string, language, formatter_style, line_spacing, line_numbers_from)
+    source: Literal['memory', 'disk', 'built'] = 'memory'
+    layout = CODE_LAYOUT_CACHE.get(key) if memory else None
+    if layout is not None:
+        CODE_LAYOUT_CACHE.move_to_end(key)
+    else:
+        data = cache.load(key) if cache is not None else None
+        if data is not None:
+            try:
+                layout = pickle.loads(data)
+                source = 'disk'
+            except Exception:
+                # 损坏或不兼容的缓存条目直接重建
+                layout = None
+        if layout is None:
+            with codeFont():
+                layout = tuple(Code(
+                    code_string=code_string,
+                    language=language,
+                    formatter_style=formatter_style,
+                    line_numbers_from=line_numbers_from,
+                    paragraph_config={
+                        'font': 'CodeVideoRendererFont',
+                        'line_spacing': line_spacing
+                    }
+                ).submobjects[1:3])
+            # 相同字形共用同一份点数据
+            for mobject in layout:
+                shareGlyphs(mobject)
+            source = 'built'
+            if cache is not None:
+                try:
+                    data = pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    # 部分渲染器的对象无法序列化，只缓存在内存中
+                    data = None
+                if data is not None:
+                    cache.store(key, data)
+        if memory and _keep_layouts:
+            CODE_LAYOUT_CACHE[key] = layout # type: ignore[reportArgumentType]
+            # 按字形总数限制内存中的排版，单个超出上限的排版也不保留
+            glyphs = sum(_glyphCount(entry) for entry in CODE_LAYOUT_CACHE.values())
+            while CODE_LAYOUT_CACHE and glyphs > DEFAULT_CODE_LAYOUT_CACHE_GLYPHS:
+                glyphs -= _glyphCount(CODE_LAYOUT_CACHE.popitem(last=False)[1])
+    line_numbers, code = layout
+    return line_numbers.copy(), code.copy(), source
+
+class _LazyLines:
+    # 按行索引的视图，访问某一行时才排版它所在的分块
+    def __init__(self, layout: "LazyCodeLayout", part: int):
+        self.layout = layout
+        self.part = part
+
+    def __getitem__(self, line: int) -> Mobject:
+        return self.layout.line(line)[self.part]
+
+    def __len__(self) -> int:
+        return self.layout.line_count
+
+class LazyCodeLayout:
+    """
+    A code layout whose lines are built on demand, in chunks of `chunk_lines` lines, and can be released again.
+
+    The position of every line is fixed in advance by a line grid that is measured on a small layout of two
+    padding lines: the distance between lines, the position of the last padding glyph and the right edge and top
+    of the line numbers. Every chunk is laid out by `codeLayout` with a padding line after its last line, then
+    moved so that the padding line falls on its row of the grid. The cost of a chunk does not depend on the
+    length of the code, so the first frame can be rendered right away.
+
+    Every chunk is highlighted separately, so tokens that span chunks, such as multi-line strings, may be
+    highlighted differently than in a complete layout. The line numbers are grey.
+
+    Args:
+        code_string (str): The code, as passed to manim's `Code`, without a padding line.
+        padding (int): The column of the padding glyph, which sets the width of `reference`.
+        language (PygmentsLanguage): The programming language of the code.
+        formatter_style (PygmentsFormatterStyle): The style for syntax highlighting.
+        line_spacing (float | int): The line spacing.
+        cache (RenderCache | None): The cache the chunks are stored in, see `codeLayout`. Defaults to `None`.
+        chunk_lines (int): The number of lines laid out together. Defaults to `DEFAULT_LAZY_CHUNK_LINES`.
+
+    Attributes:
+        numbers: The line number mobject of every line, by index.
+        code: The code line mobject of every line, by index.
+        reference (Group): A padding line and the widest line number, placed on the first row.
+        numbers_x (float): The horizontal center of the widest line number.
+        tops (np.ndarray): An upper bound of the top of every line.
+        bottoms (np.ndarray): A lower bound of the bottom of every line.
+    """
+    def __init__(self, code_string: str, padding: int, language: PygmentsLanguage, formatter_style: PygmentsFormatterStyle, line_spacing: float | int, cache: RenderCache | None = None, chunk_lines: int = DEFAULT_LAZY_CHUNK_LINES):
+        if chunk_lines < 1:
+            raise ValueError("chunk_lines must be greater than or equal to 1")
+        self.lines = code_string.split('\n')
+        self.line_count = len(self.lines)
+        self.language: PygmentsLanguage = language
+        self.formatter_style: PygmentsFormatterStyle = formatter_style
+        self.line_spacing = line_spacing
+        self.cache = cache
+        self.chunk_lines = chunk_lines
+        # 填充行的首尾都是占位字符：首字符对齐代码的左边界，尾字符决定代码行矩形框的宽度
+        self.padding_line = OCCUPY_CHARACTER + ' ' * (max(padding, 1) - 1) + OCCUPY_CHARACTER
+
+        # 用两行填充行测量行网格，行号取最后一行之后的行号，与完整排版中最宽的行号相同
+        numbers, code, _ = codeLayout(f"{self.padding_line}\n{self.padding_line}", language, formatter_style, line_spacing, cache, line_numbers_from=self.line_count + 1, memory=False)
+        numbers.set_color(GREY)
+        self.pitch = code[0][-1].get_y() - code[1][-1].get_y()
+        self.anchor = code[0][-1].get_center()
+        self.numbers_right = numbers.get_right()[0]
+        self.numbers_top = numbers[0].get_top()[1]
+        self.reference = Group(code[0], numbers[0])
+        self.numbers_x = numbers[0].get_x()
+        rows = self.anchor[1] - np.arange(self.line_count) * self.pitch
+        self.tops = rows + self.pitch
+        self.bottoms = rows - self.pitch
+
+        self.chunks: dict[int, tuple[Mobject, Mobject]] = {}
+        self.numbers = _LazyLines(self, 0)
+        self.code = _LazyLines(self, 1)
+
+    def _build(self, chunk: int) -> tuple[Mobject, Mobject]:
+        start = chunk * self.chunk_lines
+        stop = min(start + self.chunk_lines, self.line_count)
+        numbers, code, _ = codeLayout(
+            "\n".join([*self.lines[start:stop], self.padding_line]),
+            self.language,
+            self.formatter_style,
+            self.line_spacing,
+            self.cache,
+            line_numbers_from=start + 1,
+            memory=False
+        )
+        # 填充行位于网格的第 stop 行
+        padding = stop - start
+        code.shift(self.anchor + np.array([0, -stop * self.pitch, 0]) - code[padding][-1].get_center())
+        numbers.shift(np.array([self.numbers_right - numbers.get_right()[0], self.numbers_top - stop * self.pitch - numbers[padding].get_top()[1], 0]))
+        numbers.set_color(GREY)
+        return numbers, code
+
+    def line(self, line: int) -> tuple[Mobject, Mobject]:
+        """
+        Get the mobjects of a line, laying out its chunk if needed.
+
+        Args:
+            line (int): The index of the line.
+
+        Returns:
+            tuple[Mobject, Mobject]: The line number and the code line.
+        """
+        chunk, index = divmod(line, self.chunk_lines)
+        if chunk not in self.chunks:
+            self.chunks[chunk] = self._build(chunk)
+        numbers, code = self.chunks[chunk]
+        return numbers[index], code[index]
+
+    def release(self, line: int) -> None:
+        """
+        Drop the chunks that end before a line. Mobjects of these chunks that are still used elsewhere are kept alive by those references.
+
+        Args:
+            line (int): The first line that is still needed.
+        """
+        for chunk in [chunk for chunk in self.chunks if (chunk + 1) * self.chunk_lines <= line]:
+            del self.chunks[chunk]
+
+__all__ = [
+    "CODE_LAYOUT_CACHE",
+    "codeLayoutKey",
+    "codeLayout",
+    "keepCodeLayouts",
+    "LazyCodeLayout"
+]
@@ -0,0 +1,255 @@
+from dataclasses import dataclass
+from functools import cached_property
+import numpy as np
+import random, json, hashlib
+
+from .config import *
+from .typing import StrPath
+
+@dataclass(frozen=True, eq=False)
+class TypingPlan:
+    """
+    The compiled keystroke timeline of a code animation.
+
+    Per-line data is indexed by line, per-keystroke data by keystroke. The keystrokes of line `i` are
+    `line_offsets[i]:line_offsets[i+1]`.
+
+    Attributes:
+        code (str): The code as it is passed to manim's `Code`. Middle spaces are replaced with `OCCUPY_CHARACTER`.
+        interval_range (tuple[float, float]): The range the typing intervals were drawn from.
+        line_offsets (np.ndarray): The index of the first keystroke of each line, plus the total number of keystrokes.
+        empty_lines (np.ndarray): Whether each line is empty (only whitespace).
+        offset_lines (np.ndarray): Whether each line only contains characters without ascenders and needs `CODE_OFFSET`.
+        lines (np.ndarray): The line of each keystroke.
+        columns (np.ndarray): The column of each keystroke.
+        glyphs (np.ndarray): The index of the submobject revealed by each keystroke in its line, or -1 for spaces.
+        anchors (np.ndarray): The index of the submobject the cursor is placed next to after each keystroke.
+        delays (np.ndarray): The run time of the camera animation of each keystroke.
+        line_breaks (np.ndarray): Whether each keystroke is the first one after an indentation.
+        camera_offsets (np.ndarray): The vertical offset of the camera target from the cursor, in units of
+            `DEFAULT_CAMERA_WAVE_AMPLITUDE` times the camera frame height.
+    """
+    code: str
+    interval_range: tuple[float, float]
+    line_offsets: np.ndarray
+    empty_lines: np.ndarray
+    offset_lines: np.ndarray
+    lines: np.ndarray
+    columns: np.ndarray
+    glyphs: np.ndarray
+    anchors: np.ndarray
+    delays: np.ndarray
+    line_breaks: np.ndarray
+    camera_offsets: np.ndarray
+
+    _ARRAYS = ('line_offsets', 'empty_lines', 'offset_lines', 'lines', 'columns', 'glyphs', 'anchors', 'delays', 'line_breaks', 'camera_offsets')
+
+    @classmethod
+    def compile(cls, code: str, interval_range: tuple[float | int, float | int], rng: random.Random | None = None) -> "TypingPlan":
+        """
+        Compile code into a typing plan in a single pass.
+
+        This covers what `stripEmptyLines`, `findSpacePositions`, `findEmptyLinePositions` and
+        `replaceMiddleSpacesWithOccupyCharacter` do, and precomputes everything the animation needs per keystroke.
+
+        Args:
+            code (str): The code to animate, with tabs already expanded.
+            interval_range (tuple[float | int, float | int]): The range of typing intervals between characters.
+            rng (random.Random | None): The random generator for the typing intervals. Defaults to `None`, which uses the `random` module.
+
+        Returns:
+            TypingPlan: The compiled plan.
+        """
+        uniform = (rng or random).uniform
+        source_lines = code.splitlines()
+
+        # 去除首尾空行
+        start, end = 0, len(source_lines)
+        while start < end and source_lines[start].strip() == '':
+            start += 1
+        while end > start and source_lines[end - 1].strip() == '':
+            end -= 1
+
+        code_lines: list[str] = []
+        line_offsets = [0]
+        empty_lines: list[bool] = []
+        offset_lines: list[bool] = []
+        lines: list[int] = []
+        columns: list[int] = []
+        glyphs: list[int] = []
+        anchors: list[int] = []
+        delays: list[float] = []
+        line_breaks: list[bool] = []
+        camera_offsets: list[float] = []
+
+        for line, source in enumerate(source_lines[start:end]):
+            # 中间空格替换为占位字符，空行与纯空格行整体替换
+            first_non_space = len(source) - len(source.lstrip(' '))
+            last_non_space = len(source.rstrip(' ')) - 1
+            if first_non_space > last_non_space:
+                text = (source or ' ').replace(' ', OCCUPY_CHARACTER)
+            else:
+                text = source[:first_non_space] + source[first_non_space:last_non_space+1].replace(' ', OCCUPY_CHARACTER) + source[last_non_space+1:]
+            code_lines.append(text)
+            offset_lines.append(set(text) <= OFFSET_CHARACTERS)
+
+            empty = source.strip() == ''
+            empty_lines.append(empty)
+            if empty:
+                line_offsets.append(len(lines))
+                continue
+
+            indent = len(text) - len(text.lstrip())
+            char_num = len(text.strip())
+            max_idx = char_num - 1
+            omega = char_num / 15 * 2 * np.pi
+
+            submobjects_char_index = 0
+            for column in range(indent, indent + char_num):
+                glyph = -1
+                if not text[column].isspace():
+                    if source[column] != ' ':
+                        glyph = submobjects_char_index
+                    submobjects_char_index += 1
+
+                lines.append(line)
+                columns.append(column)
+                glyphs.append(glyph)
+                anchors.append(submobjects_char_index - 1)
+
+                # 缩进后的第一个字符先执行换行归位，其余字符的相机做包络振荡
+                if column == indent and indent != 0:
+                    line_breaks.append(True)
+                    delays.append(DEFAULT_LINE_BREAK_RUN_TIME)
+                    camera_offsets.append(0.0)
+                else:
+                    alpha = (column - indent) / max_idx if max_idx > 0 else 1.0
+                    line_breaks.append(False)
+                    delays.append(uniform(*interval_range))
+                    camera_offsets.append(float(np.sin(alpha * np.pi) * np.sin(alpha * omega)))
+            line_offsets.append(len(lines))
+
+        return cls(
+            code='\n'.join(code_lines),
+            interval_range=(float(interval_range[0]), float(interval_range[1])),
+            line_offsets=np.array(line_offsets, dtype=np.int64),
+            empty_lines=np.array(empty_lines, dtype=np.bool_),
+            offset_lines=np.array(offset_lines, dtype=np.bool_),
+            lines=np.array(lines, dtype=np.int32),
+            columns=np.array(columns, dtype=np.int32),
+            glyphs=np.array(glyphs, dtype=np.int32),
+            anchors=np.array(anchors, dtype=np.int32),
+            delays=np.array(delays, dtype=np.float64),
+            line_breaks=np.array(line_breaks, dtype=np.bool_),
+            camera_offsets=np.array(camera_offsets, dtype=np.float64)
+        )
+
+    @cached_property
+    def code_lines(self) -> list[str]:
+        """The lines of `code`."""
+        return self.code.splitlines()
+
+    @property
+    def line_count(self) -> int:
+        """The number of code lines."""
+        return len(self.empty_lines)
+
+    @property
+    def max_line_width(self) -> int:
+        """The length of the longest line without trailing spaces."""
+        return max(len(line.rstrip()) for line in self.code_lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def segments(self, count: int) -> list[tuple[int, int]]:
+        """
+        Split the code lines into contiguous ranges of roughly equal animation time.
+
+        Args:
+            count (int): The maximum number of ranges.
+
+        Returns:
+            list[tuple[int, int]]: The `(start, stop)` line ranges, in order and covering every line.
+        """
+        if count < 1:
+            raise ValueError("count must be greater than or equal to 1")
+        # 每行的时长：按键间隔之和加上换行动画
+        elapsed = np.concatenate(([0], np.cumsum(self.delays)))
+        line_times = elapsed[self.line_offsets[1:]] - elapsed[self.line_offsets[:-1]] + DEFAULT_LINE_BREAK_RUN_TIME
+        line_ends = np.cumsum(line_times)
+        targets = line_ends[-1] * np.arange(1, count) / count
+        bounds = np.unique(np.concatenate(([0], np.searchsorted(line_ends, targets, side='right'), [self.line_count])))
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def prefixDigests(self, stops: list[int]) -> list[str]:
+        """
+        Hash the code lines and typing intervals before each of the given lines.
+
+        Two plans share the digest of a line exactly when everything typed before that line is the same.
+
+        Args:
+            stops (list[int]): The line indices, in ascending order.
+
+        Returns:
+            list[str]: The hexadecimal BLAKE2b digest of each prefix.
+        """
+        code_lines = self.code_lines
+        delays = np.ascontiguousarray(self.delays)
+        digest = hashlib.blake2b(digest_size=16)
+        digests: list[str] = []
+        line = 0
+        for stop in stops:
+            # 逐段更新同一个哈希对象，总开销与代码长度成正比
+            for line in range(line, stop):
+                digest.update(code_lines[line].encode('utf-8') + b'\n')
+                digest.update(delays[self.line_offsets[line]:self.line_offsets[line+1]].tobytes())
+            line = stop
+            digests.append(digest.copy().hexdigest())
+        return digests
+
+    def save(self, path: StrPath) -> None:
+        """
+        Save the plan to a `.npz` file.
+
+        Args:
+            path (StrPath): The file to write.
+        """
+        with open(path, 'wb') as file:
+            np.savez_compressed(
+                file,
+                code=np.frombuffer(self.code.encode('utf-8'), dtype=np.uint8),
+                meta=np.frombuffer(json.dumps({
+                    'format': TYPING_PLAN_FORMAT,
+                    'interval_range': self.interval_range
+                }).encode('utf-8'), dtype=np.uint8),
+                **{name: getattr(self, name) for name in self._ARRAYS}
+            )
+
+    @classmethod
+    def load(cls, path: StrPath) -> "TypingPlan":
+        """
+        Load a plan saved by `save`.
+
+        Args:
+            path (StrPath): The file to read.
+
+        Returns:
+            TypingPlan: The loaded plan.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta.get('format') != TYPING_PLAN_FORMAT:
+                raise ValueError(f"'{path}' is not a typing plan of format {TYPING_PLAN_FORMAT}")
+            return cls(
+                code=data['code'].tobytes().decode('utf-8'),
+                interval_range=tuple(meta['interval_range']),
+                **{name: data[name] for name in cls._ARRAYS}
+            )
+
+__all__ = [
+    "TypingPlan"
+]
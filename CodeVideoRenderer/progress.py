@@ -0,0 +1,286 @@
+from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, TransferSpeedColumn
+from dataclasses import dataclass, asdict
+from time import perf_counter
+from typing import Callable, TextIO
+from copy import copy
+import json, sys
+
+from .config import *
+
+class DefaultProgressBar(Progress):
+    """
+    Default progress bar.
+    """
+    def __init__(self, output: bool):
+        super().__init__(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[yellow]{task.completed}/{task.total}"),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TimeRemainingColumn(),
+            TransferSpeedColumn(),
+            console=DEFAULT_OUTPUT_CONSOLE if output else None
+        )
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    The progress of a task, as reported by `CallbackProgress`.
+
+    Attributes:
+        task (str): The task, such as `'Total'` (typing the code), `'Segments'`, `'Raster Compositing'`, `'Glow Effect'` or `'Batch'`.
+        unit (str): What is counted: `'characters'`, `'frames'`, `'segments'` or `'videos'`.
+        completed (int): The number of units done.
+        total (int): The total number of units.
+        frames (int | None): The number of frames rendered so far, for tasks that know it.
+        elapsed (float): The seconds since the task started.
+        eta (float | None): The estimated seconds until the task is done, or `None` before any progress.
+        done (bool): Whether this is the last event of the task.
+    """
+    task: str
+    unit: str
+    completed: int
+    total: int
+    frames: int | None
+    elapsed: float
+    eta: float | None
+    done: bool
+
+class ProgressTask:
+    """
+    A task started by a `ProgressSink`. This base class ignores every update.
+
+    A task is a context manager that closes it when the context exits.
+    """
+    def advance(self, amount: int = 1) -> None:
+        """
+        Count units as done.
+
+        Args:
+            amount (int): The number of units. Defaults to 1.
+        """
+
+    def section(self, description: str, total: int) -> "ProgressTask":
+        """
+        Start a part of the task, such as a code line. Advancing the section also advances the task. Closing it
+        does not close the task.
+
+        Args:
+            description (str): The description of the section.
+            total (int): The number of units in the section.
+
+        Returns:
+            ProgressTask: The section, to be closed when it is done.
+        """
+        return _Section(self)
+
+    def close(self) -> None:
+        """Finish the task."""
+
+    def __enter__(self) -> "ProgressTask":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+class _Section(ProgressTask):
+    # 不单独显示的部分：直接转发到任务，不增加额外的调用
+    def __init__(self, task: ProgressTask):
+        self.advance = task.advance
+
+_NULL_TASK = ProgressTask()
+
+class ProgressSink:
+    """
+    The receiver of the progress of renders. This base class discards it, see `NullProgress`.
+    """
+    def task(self, description: str, total: int, unit: str = 'items', frames: Callable[[], int | None] | None = None) -> ProgressTask:
+        """
+        Start a task.
+
+        Args:
+            description (str): The description of the task.
+            total (int): The number of units of the task.
+            unit (str): What is counted. Defaults to `'items'`.
+            frames (Callable[[], int | None] | None): A function returning the number of frames rendered so far, called only when the sink reports it. Defaults to `None`.
+
+        Returns:
+            ProgressTask: The task.
+        """
+        return _NULL_TASK
+
+class NullProgress(ProgressSink):
+    """Discard all progress. Every update is a call of an empty method."""
+
+class _RichTask(ProgressTask):
+    def __init__(self, description: str, total: int):
+        self.bar = copy(DefaultProgressBar(True))
+        self.bar.start()
+        self.id = self.bar.add_task(description=f"[yellow]{description}[/yellow]", total=total)
+
+    def advance(self, amount: int = 1) -> None:
+        self.bar.advance(self.id, advance=amount)
+
+    def section(self, description: str, total: int) -> ProgressTask:
+        return _RichSection(self, description, total)
+
+    def close(self) -> None:
+        self.bar.remove_task(self.id)
+        self.bar.stop()
+
+class _RichSection(ProgressTask):
+    def __init__(self, task: _RichTask, description: str, total: int):
+        self.task = task
+        self.id = task.bar.add_task(description=f"[green]{description}[/green]", total=total)
+
+    def advance(self, amount: int = 1) -> None:
+        self.task.bar.advance(self.id, advance=amount)
+        self.task.advance(amount)
+
+    def close(self) -> None:
+        self.task.bar.remove_task(self.id)
+
+class RichProgress(ProgressSink):
+    """
+    Display every task as a Rich progress bar (`DefaultProgressBar`) on `DEFAULT_OUTPUT_CONSOLE`, with a bar for
+    each section. Every update is passed to Rich immediately; wrap the sink in `ThrottledProgress` to limit them.
+    """
+    def task(self, description: str, total: int, unit: str = 'items', frames: Callable[[], int | None] | None = None) -> ProgressTask:
+        return _RichTask(description, total)
+
+class _ThrottledTask(ProgressTask):
+    def __init__(self, task: ProgressTask, interval: float):
+        self.task = task
+        self.interval = interval
+        self.pending = 0
+        self.next_time = 0.0
+
+    def advance(self, amount: int = 1) -> None:
+        self.pending += amount
+        now = perf_counter()
+        if now >= self.next_time:
+            self.next_time = now + self.interval
+            self.task.advance(self.pending)
+            self.pending = 0
+
+    def close(self) -> None:
+        if self.pending:
+            self.task.advance(self.pending)
+            self.pending = 0
+        self.task.close()
+
+class ThrottledProgress(ProgressSink):
+    """
+    Pass the progress to another sink at most `rate` times per second per task. Sections are not passed on, only
+    their progress.
+
+    Args:
+        sink (ProgressSink | None): The sink that receives the updates. Defaults to `None`, which uses `RichProgress()`.
+        rate (float): The maximum number of updates per second. Defaults to `DEFAULT_PROGRESS_RATE`.
+    """
+    def __init__(self, sink: ProgressSink | None = None, rate: float = DEFAULT_PROGRESS_RATE):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.sink = sink if sink is not None else RichProgress()
+        self.interval = 1 / rate
+
+    def task(self, description: str, total: int, unit: str = 'items', frames: Callable[[], int | None] | None = None) -> ProgressTask:
+        return _ThrottledTask(self.sink.task(description, total, unit, frames), self.interval)
+
+class _EventTask(ProgressTask):
+    def __init__(self, callback: Callable[[ProgressEvent], None], interval: float, description: str, total: int, unit: str, frames: Callable[[], int | None] | None):
+        self.callback = callback
+        self.interval = interval
+        self.description = description
+        self.total = total
+        self.unit = unit
+        self.frames = frames
+        self.completed = 0
+        self.start = perf_counter()
+        self.next_time = self.start + interval
+
+    def advance(self, amount: int = 1) -> None:
+        self.completed += amount
+        now = perf_counter()
+        if now >= self.next_time:
+            self.next_time = now + self.interval
+            self._emit(now, done=False)
+
+    def _emit(self, now: float, done: bool) -> None:
+        elapsed = now - self.start
+        # 按已完成的比例估计剩余时间
+        eta = elapsed / self.completed * max(self.total - self.completed, 0) if self.completed else None
+        self.callback(ProgressEvent(
+            task=self.description,
+            unit=self.unit,
+            completed=self.completed,
+            total=self.total,
+            frames=self.frames() if self.frames is not None else None,
+            elapsed=elapsed,
+            eta=0.0 if done else eta,
+            done=done
+        ))
+
+    def close(self) -> None:
+        self._emit(perf_counter(), done=True)
+
+class CallbackProgress(ProgressSink):
+    """
+    Report the progress as `ProgressEvent`s, at most `rate` times per second per task and once when a task is done.
+
+    Args:
+        callback (Callable[[ProgressEvent], None]): The function called with every event.
+        rate (float): The maximum number of events per second per task. Defaults to `DEFAULT_PROGRESS_RATE`.
+    """
+    def __init__(self, callback: Callable[[ProgressEvent], None], rate: float = DEFAULT_PROGRESS_RATE):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.callback = callback
+        self.interval = 1 / rate
+
+    def task(self, description: str, total: int, unit: str = 'items', frames: Callable[[], int | None] | None = None) -> ProgressTask:
+        return _EventTask(self.callback, self.interval, description, total, unit, frames)
+
+class JsonLinesProgress(CallbackProgress):
+    """
+    Write the progress events of `CallbackProgress` to a text stream, one JSON object per line.
+
+    Args:
+        stream (TextIO | None): The stream. Defaults to `None`, which uses the standard error stream.
+        rate (float): The maximum number of events per second per task. Defaults to `DEFAULT_PROGRESS_RATE`.
+    """
+    def __init__(self, stream: TextIO | None = None, rate: float = DEFAULT_PROGRESS_RATE):
+        super().__init__(self._write, rate)
+        self.stream = stream
+
+    def _write(self, event: ProgressEvent) -> None:
+        stream = self.stream if self.stream is not None else sys.stderr
+        stream.write(json.dumps(asdict(event)) + '\n')
+        stream.flush()
+
+def defaultProgress(output: bool) -> ProgressSink:
+    """
+    Choose the progress sink used when none is given.
+
+    Args:
+        output (bool): Whether console output is enabled.
+
+    Returns:
+        ProgressSink: `RichProgress()` if `output` is set and `DEFAULT_OUTPUT_CONSOLE` is a terminal, otherwise `NullProgress()`.
+    """
+    if output and DEFAULT_OUTPUT_CONSOLE.is_terminal:
+        return RichProgress()
+    return NullProgress()
+
+__all__ = [
+    "ProgressEvent",
+    "ProgressTask",
+    "ProgressSink",
+    "NullProgress",
+    "RichProgress",
+    "ThrottledProgress",
+    "CallbackProgress",
+    "JsonLinesProgress",
+    "defaultProgress",
+    "DefaultProgressBar"
+]
@@ -0,0 +1,421 @@
+from manim import Camera, Mobject, ImageMobject, ManimColor, Group, rate_functions, config, WHITE, GREY
+from manim.typing import Point3D
+from dataclasses import dataclass, field
+from typing import Callable, Generator, Hashable
+from collections import OrderedDict
+import numpy as np
+
+from .config import *
+from .progress import ProgressSink, defaultProgress
+from .encoder import EncoderConfig, FFmpegEncoder
+from .typing import StrPath, BinaryOutput
+
+def captureMobjects(mobjects: list[Mobject], center: Point3D, pixel_width: int, pixel_height: int, ppu: float) -> np.ndarray:
+    """
+    Rasterize mobjects with Cairo onto a transparent canvas.
+
+    Args:
+        mobjects (list[Mobject]): The mobjects to rasterize.
+        center (Point3D): The scene coordinates of the center of the canvas.
+        pixel_width (int): The width of the canvas in pixels.
+        pixel_height (int): The height of the canvas in pixels.
+        ppu (float): Pixels per scene unit.
+
+    Returns:
+        np.ndarray: A premultiplied RGBA uint8 array of shape `(pixel_height, pixel_width, 4)`.
+    """
+    camera = Camera(
+        pixel_width=pixel_width,
+        pixel_height=pixel_height,
+        frame_width=pixel_width / ppu,
+        frame_height=pixel_height / ppu,
+        frame_center=center,
+        background_opacity=0
+    )
+    camera.capture_mobjects(mobjects)
+    return camera.pixel_array
+
+FROZEN_LAYER_CACHE: OrderedDict[Hashable, tuple[np.ndarray, float, float, Point3D]] = OrderedDict()
+"""
+Rasterized layers created by `freezeMobjects`, stored as `(pixels, width, height, center)` and evicted in LRU order
+once their pixels take more than `DEFAULT_FROZEN_LAYER_CACHE_BYTES` bytes.
+"""
+
+def freezeMobjects(mobjects: list[Mobject], ppu: float, key: Hashable | None = None) -> ImageMobject:
+    """
+    Flatten mobjects into a single `ImageMobject` that covers exactly the same area.
+
+    Args:
+        mobjects (list[Mobject]): The mobjects to flatten.
+        ppu (float): Pixels per scene unit of the bitmap.
+        key (Hashable | None): Identifies the layer in `FROZEN_LAYER_CACHE`. The key must change whenever anything
+            that affects the look of the mobjects changes. Defaults to `None`, which disables caching.
+
+    Returns:
+        ImageMobject: The flattened layer.
+    """
+    if key is not None and key in FROZEN_LAYER_CACHE:
+        FROZEN_LAYER_CACHE.move_to_end(key)
+        pixels, width, height, center = FROZEN_LAYER_CACHE[key]
+    else:
+        group = Group(*mobjects)
+        pixel_width = int(np.ceil((group.width + 2 * RASTER_MARGIN) * ppu))
+        pixel_height = int(np.ceil((group.height + 2 * RASTER_MARGIN) * ppu))
+        width, height, center = pixel_width / ppu, pixel_height / ppu, group.get_center()
+        pixels = captureMobjects(mobjects, center, pixel_width, pixel_height, ppu)
+
+        # Cairo输出预乘透明度，ImageMobject需要直通透明度；只有半透明的边缘像素需要换算
+        rows, columns = np.nonzero((pixels[..., 3] > 0) & (pixels[..., 3] < 255))
+        alpha = pixels[rows, columns, 3:4].astype(np.uint16)
+        pixels[rows, columns, :3] = np.minimum((pixels[rows, columns, :3].astype(np.uint16) * 255 + alpha // 2) // alpha, 255)
+
+        if key is not None:
+            FROZEN_LAYER_CACHE[key] = (pixels, width, height, center)
+            size = sum(entry[0].nbytes for entry in FROZEN_LAYER_CACHE.values())
+            while len(FROZEN_LAYER_CACHE) > 1 and size > DEFAULT_FROZEN_LAYER_CACHE_BYTES:
+                size -= FROZEN_LAYER_CACHE.popitem(last=False)[1][0].nbytes
+
+    return ImageMobject(pixels).stretch_to_fit_width(width).stretch_to_fit_height(height).move_to(center)
+
+@dataclass
+class RasterKeyframe:
+    """
+    A single `scene.play` (or `scene.wait`) recorded from `CameraFollowCursorCVScene`.
+    """
+    start_center: Point3D
+    start_width: float
+    end_center: Point3D
+    end_width: float
+    run_time: float
+    rate_func: Callable[[float], float]
+    line: int
+    revealed: int
+    cursor_center: Point3D
+    rectangle_center: Point3D
+
+@dataclass
+class RasterLine:
+    """
+    The mobjects of a single code line in the order they are revealed.
+    """
+    number: Mobject
+    glyphs: list[Mobject] = field(default_factory=list)
+
+class RasterRecorder:
+    """
+    Record the camera trajectory and the glyph reveal order of `CameraFollowCursorCVScene` without rendering any frame.
+
+    While a recorder is attached to the scene, every camera animation is applied to the camera frame immediately
+    and stored as a `RasterKeyframe`, so that `RasterEngine` can replay the exact same trajectory.
+    """
+    def __init__(self):
+        self.keyframes: list[RasterKeyframe] = []
+        self.lines: list[RasterLine] = []
+        self.cursor: Mobject | None = None
+        self.rectangle: Mobject | None = None
+
+    def attach(self, cursor: Mobject, rectangle: Mobject) -> None:
+        """
+        Register the cursor and the code line rectangle, whose positions are stored with every keyframe.
+
+        Args:
+            cursor (Mobject): The cursor mobject.
+            rectangle (Mobject): The code line rectangle mobject.
+        """
+        self.cursor = cursor
+        self.rectangle = rectangle
+
+    def beginLine(self, line: int, number: Mobject) -> None:
+        """
+        Start recording a new code line. Calling it again for the current line has no effect.
+
+        Args:
+            line (int): The index of the line.
+            number (Mobject): The line number mobject of the line.
+        """
+        if line == len(self.lines):
+            self.lines.append(RasterLine(number=number))
+
+    def reveal(self, glyph: Mobject) -> None:
+        """
+        Record that a glyph of the current line has been added to the scene.
+
+        Args:
+            glyph (Mobject): The revealed glyph.
+        """
+        self.lines[-1].glyphs.append(glyph)
+
+    def play(self, frame: Mobject, animations: list[dict[str, Point3D | float]], run_time: float, rate_func: Callable[[float], float] = rate_functions.smooth) -> None:
+        """
+        Apply the queued camera animations to the camera frame and record them as a keyframe.
+
+        Args:
+            frame (Mobject): The camera frame.
+            animations (list[dict[str, Point3D | float]]): The queued camera animations (`scene.Animation_list`).
+            run_time (float): The run time of the animation.
+            rate_func (Callable[[float], float]): The rate function of the animation. Defaults to `rate_functions.smooth`.
+        """
+        start_center, start_width = frame.get_center(), frame.width
+        for anim in animations:
+            if "move_to" in anim:
+                frame.move_to(anim["move_to"]) # type: ignore[reportArgumentType]
+            elif "scale" in anim:
+                frame.scale(anim["scale"]) # type: ignore[reportArgumentType]
+        self._record(start_center, start_width, frame, run_time, rate_func)
+
+    def wait(self, frame: Mobject, duration: float = 1) -> None:
+        """
+        Record a pause in which nothing moves.
+
+        Args:
+            frame (Mobject): The camera frame.
+            duration (float): The duration of the pause. Defaults to 1.
+        """
+        self._record(frame.get_center(), frame.width, frame, duration, rate_functions.linear)
+
+    def _record(self, start_center: Point3D, start_width: float, frame: Mobject, run_time: float, rate_func: Callable[[float], float]) -> None:
+        self.keyframes.append(RasterKeyframe(
+            start_center=start_center,
+            start_width=start_width,
+            end_center=frame.get_center(),
+            end_width=frame.width,
+            run_time=run_time,
+            rate_func=rate_func,
+            line=len(self.lines) - 1,
+            revealed=len(self.lines[-1].glyphs) if self.lines else 0,
+            cursor_center=self.cursor.get_center(), # type: ignore[reportOptionalMemberAccess]
+            rectangle_center=self.rectangle.get_center() # type: ignore[reportOptionalMemberAccess]
+        ))
+
+@dataclass
+class _RasterLayer:
+    """
+    A rasterized, premultiplied RGBA layer placed on the integer pixel grid of the canvas.
+    """
+    x: int
+    y: int
+    pixels: np.ndarray
+
+class RasterEngine:
+    """
+    Render a recorded `CameraFollowCursorCVScene` by compositing pre-rasterized layers with NumPy.
+
+    Every code line is rasterized once by Cairo into a high resolution strip. Each output frame is then produced by
+    cropping the region under the camera frame from the strips, the line highlight and the cursor, and resampling it
+    to the output resolution.
+
+    Args:
+        recorder (RasterRecorder): A recorder filled by running the scene's `construct`.
+        supersample (float): Canvas pixels per output pixel at the tightest camera zoom. Defaults to `DEFAULT_RASTER_SUPERSAMPLE`.
+    """
+    def __init__(self, recorder: RasterRecorder, supersample: float = DEFAULT_RASTER_SUPERSAMPLE):
+        self.recorder = recorder
+        self.pixel_width: int = config.pixel_width
+        self.pixel_height: int = config.pixel_height
+        self.frame_rate: float = config.frame_rate
+        self.background = np.array(ManimColor.parse(config.background_color).to_rgb(), dtype=np.float32)
+
+        # 画布分辨率取决于相机的最小取景宽度
+        min_width = min(min(keyframe.start_width, keyframe.end_width) for keyframe in recorder.keyframes)
+        self.ppu = self.pixel_width / min_width * supersample
+
+        rectangle: Mobject = recorder.rectangle # type: ignore[reportAssignmentType]
+        self.rectangle_size = np.array([rectangle.width, rectangle.height])
+        self.rectangle_color = np.array(ManimColor.parse(rectangle.get_fill_color()).to_rgb(), dtype=np.float32)
+
+        # 画布原点（左上角）
+        everything = Group(*[line.number for line in recorder.lines], *[glyph for line in recorder.lines for glyph in line.glyphs])
+        self.origin = np.array([
+            min(everything.get_left()[0], rectangle.get_left()[0]) - RASTER_MARGIN,
+            everything.get_top()[1] + RASTER_MARGIN
+        ])
+        del everything
+
+        self.strips: list[_RasterLayer] = []
+        self.numbers: list[_RasterLayer] = []
+        self.cuts: list[np.ndarray] = []
+        self.cursor: _RasterLayer | None = None
+
+    def toCanvas(self, x: float, y: float) -> tuple[float, float]:
+        """
+        Convert a point in scene coordinates into canvas pixel coordinates.
+
+        Args:
+            x (float): The x coordinate in scene units.
+            y (float): The y coordinate in scene units.
+
+        Returns:
+            tuple[float, float]: The point on the canvas.
+        """
+        return (x - self.origin[0]) * self.ppu, (self.origin[1] - y) * self.ppu
+
+    def _rasterize(self, mobjects: list[Mobject], color: ManimColor | None = None) -> _RasterLayer:
+        """Rasterize mobjects onto a transparent layer aligned to the canvas pixel grid."""
+        group = Group(*mobjects)
+        left, top = self.toCanvas(group.get_left()[0] - RASTER_MARGIN, group.get_top()[1] + RASTER_MARGIN)
+        right, bottom = self.toCanvas(group.get_right()[0] + RASTER_MARGIN, group.get_bottom()[1] - RASTER_MARGIN)
+        x, y = int(np.floor(left)), int(np.floor(top))
+        width, height = int(np.ceil(right)) - x, int(np.ceil(bottom)) - y
+        center = np.array([
+            self.origin[0] + (x + width / 2) / self.ppu,
+            self.origin[1] - (y + height / 2) / self.ppu,
+            0
+        ])
+
+        if color is not None:
+            group = group.copy().set_color(color)
+        pixels = captureMobjects(group.submobjects, center, width, height, self.ppu)
+        return _RasterLayer(x=x, y=y, pixels=pixels.astype(np.float32) / 255)
+
+    def rasterize(self) -> None:
+        """
+        Rasterize every code line, line number and the cursor once.
+        """
+        for line in self.recorder.lines:
+            # 行号仅保存覆盖率，合成时再着色（当前行白色，其余灰色）
+            self.numbers.append(self._rasterize([line.number], color=WHITE))
+            if not line.glyphs:
+                self.strips.append(_RasterLayer(x=0, y=0, pixels=np.zeros((0, 0, 4), dtype=np.float32)))
+                self.cuts.append(np.zeros(1))
+                continue
+            strip = self._rasterize(line.glyphs)
+            self.strips.append(strip)
+
+            # 逐字显示的分界线：相邻两个字符之间的中点
+            lefts = np.array([self.toCanvas(glyph.get_left()[0], 0)[0] for glyph in line.glyphs]) - strip.x
+            rights = np.array([self.toCanvas(glyph.get_right()[0], 0)[0] for glyph in line.glyphs]) - strip.x
+            cuts = np.empty(len(line.glyphs) + 1)
+            cuts[0] = 0
+            cuts[1:-1] = (rights[:-1] + lefts[1:]) / 2
+            cuts[-1] = strip.pixels.shape[1]
+            self.cuts.append(np.ceil(cuts))
+        self.cursor = self._rasterize([self.recorder.cursor]) # type: ignore[reportArgumentType]
+
+    def _composite(self, region: np.ndarray, x: int, y: int, layer: _RasterLayer, color: np.ndarray | None = None, columns: int | None = None) -> None:
+        """Composite a premultiplied layer over the region whose top-left canvas pixel is (x, y)."""
+        pixels = layer.pixels if columns is None else layer.pixels[:, :columns]
+        height, width = pixels.shape[:2]
+        x0, y0 = max(layer.x, x), max(layer.y, y)
+        x1, y1 = min(layer.x + width, x + region.shape[1]), min(layer.y + height, y + region.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        source = pixels[y0-layer.y:y1-layer.y, x0-layer.x:x1-layer.x]
+        target = region[y0-y:y1-y, x0-x:x1-x]
+        alpha = source[..., 3:4]
+        if color is None:
+            target *= 1 - alpha
+            target += source[..., :3]
+        else:
+            target *= 1 - alpha
+            target += alpha * color
+
+    def renderFrame(self, center: Point3D, width: float, keyframe: RasterKeyframe) -> np.ndarray:
+        """
+        Produce one output frame.
+
+        Args:
+            center (Point3D): The center of the camera frame.
+            width (float): The width of the camera frame.
+            keyframe (RasterKeyframe): The keyframe the frame belongs to.
+
+        Returns:
+            np.ndarray: The frame as an RGB uint8 array.
+        """
+        height = width * self.pixel_height / self.pixel_width
+        fx, fy = self.toCanvas(center[0] - width / 2, center[1] + height / 2)
+        fw, fh = width * self.ppu, height * self.ppu
+        x, y = int(np.floor(fx)), int(np.floor(fy))
+        region = np.empty((int(np.ceil(fy + fh)) - y + 1, int(np.ceil(fx + fw)) - x + 1, 3), dtype=np.float32)
+        region[:] = self.background
+
+        # 代码行矩形框
+        rx0, ry0 = self.toCanvas(*(keyframe.rectangle_center[:2] + self.rectangle_size * [-0.5, 0.5]))
+        rx1, ry1 = self.toCanvas(*(keyframe.rectangle_center[:2] + self.rectangle_size * [0.5, -0.5]))
+        rx0, ry0 = max(int(round(rx0)) - x, 0), max(int(round(ry0)) - y, 0)
+        rx1, ry1 = int(round(rx1)) - x, int(round(ry1)) - y
+        if rx1 > rx0 and ry1 > ry0:
+            region[ry0:ry1, rx0:rx1] = self.rectangle_color
+
+        # 光标
+        cursor: _RasterLayer = self.cursor # type: ignore[reportAssignmentType]
+        cursor_x, cursor_y = self.toCanvas(*keyframe.cursor_center[:2])
+        self._composite(region, x, y, _RasterLayer(
+            x=int(round(cursor_x - cursor.pixels.shape[1] / 2)),
+            y=int(round(cursor_y - cursor.pixels.shape[0] / 2)),
+            pixels=cursor.pixels
+        ))
+
+        # 行号与代码（仅合成与取景框相交的行）
+        grey, white = np.array(GREY.to_rgb(), dtype=np.float32), np.array(WHITE.to_rgb(), dtype=np.float32)
+        for line in range(keyframe.line + 1):
+            number = self.numbers[line]
+            if number.y > y + region.shape[0] or number.y + number.pixels.shape[0] < y:
+                continue
+            self._composite(region, x, y, number, color=white if line == keyframe.line else grey)
+            if self.strips[line].pixels.size:
+                columns = None if line < keyframe.line else int(self.cuts[line][keyframe.revealed])
+                self._composite(region, x, y, self.strips[line], columns=columns)
+
+        # 双线性重采样到输出分辨率
+        xs = fx - x + (np.arange(self.pixel_width) + 0.5) * fw / self.pixel_width - 0.5
+        ys = fy - y + (np.arange(self.pixel_height) + 0.5) * fh / self.pixel_height - 0.5
+        x0 = np.clip(np.floor(xs).astype(np.intp), 0, region.shape[1] - 2)
+        y0 = np.clip(np.floor(ys).astype(np.intp), 0, region.shape[0] - 2)
+        wx = np.clip(xs - x0, 0, 1).astype(np.float32)[None, :, None]
+        wy = np.clip(ys - y0, 0, 1).astype(np.float32)[:, None, None]
+        rows = region[y0] * (1 - wy) + region[y0 + 1] * wy
+        frame = rows[:, x0] * (1 - wx) + rows[:, x0 + 1] * wx
+        return (np.clip(frame, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+    def frames(self) -> Generator[np.ndarray, None, None]:
+        """
+        Yield every frame of the recorded animation, following manim's frame timing.
+
+        Yields:
+            np.ndarray: The next frame as an RGB uint8 array.
+        """
+        step = 1 / self.frame_rate
+        for keyframe in self.recorder.keyframes:
+            for t in np.arange(0, keyframe.run_time, step):
+                alpha = keyframe.rate_func(t / keyframe.run_time)
+                center = keyframe.start_center + alpha * (keyframe.end_center - keyframe.start_center)
+                width = keyframe.start_width + alpha * (keyframe.end_width - keyframe.start_width)
+                yield self.renderFrame(center, width, keyframe)
+
+    def totalFrames(self) -> int:
+        """
+        Get the number of frames that `frames` will yield.
+
+        Returns:
+            int: The number of frames.
+        """
+        step = 1 / self.frame_rate
+        return sum(len(np.arange(0, keyframe.run_time, step)) for keyframe in self.recorder.keyframes)
+
+    def write(self, path: StrPath | BinaryOutput, output: bool, frame_filter: Callable[[np.ndarray], np.ndarray] | None = None, encoder: EncoderConfig | None = None, progress: ProgressSink | None = None) -> None:
+        """
+        Rasterize the layers and encode every frame into a video file.
+
+        Args:
+            path (StrPath | BinaryOutput): Path of the video file to write, or a binary stream that receives a fragmented MP4.
+            output (bool): Whether to display a progress bar.
+            frame_filter (Callable[[np.ndarray], np.ndarray] | None): A function applied to every frame before it is encoded. Defaults to `None`.
+            encoder (EncoderConfig | None): The encoder settings. Defaults to `None`, which uses `EncoderConfig()`.
+            progress (ProgressSink | None): Where the progress is reported. Defaults to `None`, which uses `defaultProgress(output)`.
+        """
+        self.rasterize()
+        progress = progress if progress is not None else defaultProgress(output)
+        with FFmpegEncoder(path, (self.pixel_width, self.pixel_height), self.frame_rate, encoder) as writer, progress.task("Raster Compositing", self.totalFrames(), 'frames') as task:
+            for frame in self.frames():
+                writer.write(frame if frame_filter is None else frame_filter(frame))
+                task.advance()
+
+__all__ = [
+    "captureMobjects",
+    "FROZEN_LAYER_CACHE",
+    "freezeMobjects",
+    "RasterKeyframe",
+    "RasterLine",
+    "RasterRecorder",
+    "RasterEngine"
+]
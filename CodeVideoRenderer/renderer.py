@@ -1,27 +1,103 @@
-from manim import VGroup, Code, SurroundingRectangle, RoundedRectangle, MovingCameraScene, rate_functions, RendererType, config, WHITE, GREY, UP, DOWN, LEFT, RIGHT, register_font
+from manim import Mobject, Group, VGroup, SurroundingRectangle, RoundedRectangle, MovingCameraScene, rate_functions, RendererType, config, tempconfig, WHITE, GREY, UP, DOWN, LEFT, RIGHT
 from manim.typing import Point3D
+from manim.utils.exceptions import EndSceneEarlyException
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tempfile import TemporaryDirectory
+from contextlib import ExitStack
 from pathlib import Path
-from copy import copy
-from typing import Literal, Union
+from typing import Literal, Union, Generator
 from timeit import timeit
+from time import perf_counter
 from rich import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from threading import RLock, Thread, Event
+from queue import Queue, Full
 import numpy as np
-import random, inspect, os
+import os, random, hashlib, shutil
 
 from .config import *
 from .typing import *
 from .utils import *
+from .raster import *
+from .plan import *
+from .glow import *
+from .cache import *
+from .encoder import *
+from .tracing import *
+from .progress import *
+from .layout import *
 
 traceback.install()
 
+# manim的配置与日志是进程级的全局状态，同一时间只有一个场景可以使用
+_RENDER_LOCK = RLock()
+
+class _FramesClosed(Exception):
+    """Raised in the render thread of `CameraFollowCursorCV.frames` when the consumer has stopped iterating."""
+
+@dataclass(frozen=True)
+class Parameters:
+    """The arguments of a `CameraFollowCursorCV`, see its documentation."""
+    code: Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath], tuple[Literal['plan'], StrPath]]
+    language: PygmentsLanguage
+    formatter_style: PygmentsFormatterStyle
+    line_spacing: float | int
+    interval_range: tuple[float | int, float | int]
+    camera_scale: float | int
+    video_name: str
+    renderer: Literal['cairo', 'opengl']
+    seed: int | None
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """
+    How `CameraFollowCursorCV.render` produces a video. `CameraFollowCursorCV.frames` only uses `engine`,
+    `viewport_culling`, `freeze_lines` and `lazy_layout`.
+
+    Attributes:
+        engine (RenderEngine): The render engine. `'manim'` renders every frame with manim, `'raster'` rasterizes the code once and composites every frame with NumPy. Defaults to `DEFAULT_RENDER_ENGINE`.
+        viewport_culling (bool): Whether to remove code lines outside the camera frame from the scene, which keeps the cost of each frame independent of the length of the code. Defaults to `DEFAULT_VIEWPORT_CULLING`.
+        freeze_lines (bool): Whether to flatten every completed block of `DEFAULT_FROZEN_BLOCK_LINES` code lines into a cached bitmap, so that only the lines of the current block are rendered as vectors. Defaults to `DEFAULT_FREEZE_LINES`.
+        lazy_layout (bool): Whether to lay out the code in chunks of `DEFAULT_LAZY_CHUNK_LINES` lines just before the cursor reaches them, instead of all at once before the first frame, see `LazyCodeLayout`. Together with `viewport_culling`, blocks of lines far above the camera frame are released and built again if they come back into view, so that memory stays bounded for huge files. Only available with the `'manim'` engine. Defaults to `DEFAULT_LAZY_LAYOUT`.
+        glow_mode (GlowMode): How the glow effect is applied. `'stream'` glows the frames before they are encoded, `'post'` glows the rendered video in a second pass, `'parallel'` splits that pass over several processes, `'none'` skips the glow effect. Defaults to `None`, which uses the glow mode of `quality`, or `DEFAULT_GLOW_MODE` if the preset has none.
+        glow_workers (int): The number of processes used by the `'parallel'` glow mode. Defaults to `DEFAULT_GLOW_WORKERS`.
+        segments (int): The number of line ranges rendered in parallel processes and concatenated, which gives the same frames as rendering in one process. Only available with the `'manim'` engine and the `'cairo'` renderer. Defaults to `DEFAULT_RENDER_SEGMENTS`.
+        incremental (bool): Whether to render in blocks of `DEFAULT_INCREMENTAL_CHUNK_LINES` lines that are stored in the render cache, so that after an edit only the blocks from the first changed line onward are rendered again. The blocks are rendered in parallel processes and glowed separately. Requires a cache, a `seed` or a typing plan, the `'manim'` engine and the `'cairo'` renderer. Defaults to `DEFAULT_INCREMENTAL_RENDER`.
+        quality (RenderQuality): The quality preset. `'draft'` and `'preview'` lower the resolution and frame rate for this render only and choose a cheaper glow mode when `glow_mode` is not given; an explicit `glow_mode` is always kept; at a lower frame rate every keystroke lasts at least one frame. Defaults to `DEFAULT_RENDER_QUALITY`.
+        encoder (EncoderConfig | None): The ffmpeg settings of every encode: codec, preset, CRF or bitrate, pixel format, threads and audio. Defaults to `None`, which uses `EncoderConfig()` with the encoder preset of `quality` (`'ultrafast'` for drafts, `'veryfast'` for previews).
+    """
+    engine: RenderEngine = DEFAULT_RENDER_ENGINE
+    viewport_culling: bool = DEFAULT_VIEWPORT_CULLING
+    freeze_lines: bool = DEFAULT_FREEZE_LINES
+    lazy_layout: bool = DEFAULT_LAZY_LAYOUT
+    glow_mode: GlowMode | None = None
+    glow_workers: int = DEFAULT_GLOW_WORKERS
+    segments: int = DEFAULT_RENDER_SEGMENTS
+    incremental: bool = DEFAULT_INCREMENTAL_RENDER
+    quality: RenderQuality = DEFAULT_RENDER_QUALITY
+    encoder: EncoderConfig | None = None
+
+    def __post_init__(self):
+        if self.quality not in QUALITY_PRESETS:
+            raise ValueError(f"quality must be one of {', '.join(map(repr, QUALITY_PRESETS))}")
+        if self.glow_workers < 1:
+            raise ValueError("glow_workers must be greater than or equal to 1")
+        if self.segments < 1:
+            raise ValueError("segments must be greater than or equal to 1")
+        if self.segments > 1 and self.engine != 'manim':
+            raise ValueError("segments can only be used with the 'manim' engine")
+        if self.incremental and self.engine != 'manim':
+            raise ValueError("incremental can only be used with the 'manim' engine")
+        if self.lazy_layout and self.engine != 'manim':
+            raise ValueError("lazy_layout can only be used with the 'manim' engine")
+
 class CameraFollowCursorCV:
     """
     CameraFollowCursorCV is a class designed to create animated videos that simulate the process of typing code. It animates code line by line and character by 
     character while smoothly moving the camera to follow the cursor, creating a professional-looking coding demonstration.
 
     Args:
-        code (Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath]]): The code to be animated. **When using a string**, provide a tuple with the first element as `'string'` and the second element as the code string. **When using a file**, provide a tuple with the first element as `'file'` and the second element as the file path.
+        code (Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath], tuple[Literal['plan'], StrPath]]): The code to be animated. **When using a string**, provide a tuple with the first element as `'string'` and the second element as the code string. **When using a file**, provide a tuple with the first element as `'file'` and the second element as the file path. **When using a typing plan** saved by `TypingPlan.save`, provide a tuple with the first element as `'plan'` and the second element as the plan path; its typing intervals are used instead of `interval_range`.
         language (PygmentsLanguage): The programming language of the code.
         formatter_style (PygmentsFormatterStyle): The style for syntax highlighting. Defaults to `"github-dark"`.
         line_spacing (float | int): The line spacing for the code. Defaults to `DEFAULT_LINE_SPACING`.
@@ -29,12 +105,18 @@ class CameraFollowCursorCV:
         camera_scale (float | int): The scale factor for the camera. Defaults to 0.5.
         video_name (str): The name of the output video file. Defaults to `"CameraFollowCursorCV"`.
         renderer (Literal['cairo', 'opengl']): The renderer to use for video rendering. Defaults to `'cairo'`.
+        seed (int | None): The seed of the random typing intervals, so that renders with the same seed are identical. Defaults to `None`, which gives different intervals every time. Ignored when using a typing plan.
+        tracer (Tracer | None): Receives timed spans and counters of the preprocessing and of every render, see `Tracer`. Defaults to `None`, which records nothing.
     """
-    __all__ = ["render"]
+    # 只有 render、frames 与只读属性是公开的；固定的属性槽拒绝其他属性的赋值，读取不受影响
+    __slots__ = (
+        '_tracer', '_code_str', '_plan', '_parameters', '_scene_config', '_output', '_options', '_encoder',
+        '_progress', '_segment', '_stream', '_cache', '_layout_cache', '_scene'
+    )
 
     @typeChecker
     def __init__(self,
-        code: Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath]],
+        code: Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath], tuple[Literal['plan'], StrPath]],
         language: PygmentsLanguage,
         formatter_style: PygmentsFormatterStyle = "github-dark",
         line_spacing: float | int = DEFAULT_LINE_SPACING,
@@ -42,23 +124,29 @@ class CameraFollowCursorCV:
         camera_scale: float | int = 0.5,
         video_name: str = "CameraFollowCursorCV",
         renderer: Literal['cairo', 'opengl'] = 'cairo',
+        seed: int | None = None,
+        tracer: Tracer | None = None,
     ):
         # ----- 视频名称 -----
         if not video_name:
             raise ValueError("video_name must be provided")
         
-        # ----- 代码输入 -----
-        if code[0] == 'string':
-            self.code_str = code[1].expandtabs(tabsize=DEFAULT_TAB_WIDTH)
-            if not all(char not in NOT_AVAILABLE_CHARACTERS for char in self.code_str):
-                raise ValueError("'code_string' contains invalid characters")
-        elif code[0] == 'file':
-            try:
-                self.code_str = Path(code[1]).read_text(encoding="utf-8").expandtabs(tabsize=DEFAULT_TAB_WIDTH)
-                if not all(char not in NOT_AVAILABLE_CHARACTERS for char in self.code_str):
-                    raise ValueError(f"'{code[1]}' contains invalid characters")
-            except UnicodeDecodeError:
-                raise ValueError(f"Failed to decode '{code[1]}' with UTF-8 encoding") from None
+        self._tracer = tracer if tracer is not None else Tracer(enabled=False)
+        with self._tracer.span('preprocess', step='read', source=code[0]):
+            # ----- 代码输入 -----
+            if code[0] == 'string':
+                self._code_str = code[1].expandtabs(tabsize=DEFAULT_TAB_WIDTH)
+                if not all(char not in NOT_AVAILABLE_CHARACTERS for char in self._code_str):
+                    raise ValueError("'code_string' contains invalid characters")
+            elif code[0] == 'file':
+                try:
+                    self._code_str = Path(code[1]).read_text(encoding="utf-8").expandtabs(tabsize=DEFAULT_TAB_WIDTH)
+                    if not all(char not in NOT_AVAILABLE_CHARACTERS for char in self._code_str):
+                        raise ValueError(f"'{code[1]}' contains invalid characters")
+                except UnicodeDecodeError:
+                    raise ValueError(f"Failed to decode '{code[1]}' with UTF-8 encoding") from None
+            elif code[0] == 'plan':
+                self._plan = TypingPlan.load(code[1])
         
         # ----- 行间距 -----
         if line_spacing <= 0:
@@ -72,44 +160,36 @@ class CameraFollowCursorCV:
         if interval_range[0] > interval_range[1]:
             raise ValueError("The first term of interval_range must be less than or equal to the second term")
 
-        # 参数
-        global Parameters
-        @dataclass
-        class Parameters:
-            code: Union[tuple[Literal['string'], str], tuple[Literal['file'], StrPath]]
-            language: PygmentsLanguage
-            formatter_style: PygmentsFormatterStyle
-            line_spacing: float | int
-            interval_range: tuple[float | int, float | int]
-            camera_scale: float | int
-            video_name: str
-            renderer: Literal['cairo', 'opengl']
-        Parameters.code = code
-        Parameters.language = language
-        Parameters.formatter_style = formatter_style
-        Parameters.line_spacing = line_spacing
-        Parameters.interval_range = interval_range
-        Parameters.camera_scale = camera_scale
-        Parameters.video_name = video_name
-        Parameters.renderer = renderer
+        # 参数：每个实例单独保存，互不影响
+        self._parameters = Parameters(
+            code=code,
+            language=language,
+            formatter_style=formatter_style,
+            line_spacing=line_spacing,
+            interval_range=interval_range,
+            camera_scale=camera_scale,
+            video_name=video_name,
+            renderer=renderer,
+            seed=seed
+        )
 
         # 其他
-        self.code_str = stripEmptyLines(self.code_str)
-        self.space_positions = findSpacePositions(self.code_str)
-        self.empty_line_positions = findEmptyLinePositions(self.code_str)
-        self.code_str = replaceMiddleSpacesWithOccupyCharacter("\n".join([" " if line == "" else line for line in self.code_str.splitlines()]))
-        self.code_str_lines = self.code_str.splitlines()
-        self.origin_config = {
-            'disable_caching': config.disable_caching,
-            'renderer': config.renderer
+        if code[0] != 'plan':
+            with self._tracer.span('preprocess', step='compile'):
+                self._plan = TypingPlan.compile(self._code_str, interval_range, random.Random(seed) if seed is not None else None)
+        self._code_str = self._plan.code
+        # manim的配置只在渲染期间通过tempconfig修改
+        self._scene_config = {
+            'disable_caching': True,
+            'renderer': renderer
         }
-        config.disable_caching = True
-        config.renderer = renderer
-        self.scene = self._create_scene()
 
     def _create_scene(self):
         """Create manim scene to animate code rendering."""
         class CameraFollowCursorCVScene(MovingCameraScene):
+            recorder: RasterRecorder | None = None
+            glow: GlowCache | None = None
+            reused_frames: int = 0
 
             def construct(scene):
                 """Build the code animation scene."""
@@ -125,39 +205,54 @@ class CameraFollowCursorCV:
                 )
 
                 # 创建代码块
-                with register_font(os.path.join(os.path.dirname(__file__), 'fonts/CodeVideoRendererFont.ttf')):
-                    line_number_mobject, code_mobject = Code(
-                        code_string=self.code_str + f"\n{(max([len(line.rstrip()) for line in self.code_str_lines])*2)*' ' + OCCUPY_CHARACTER}",
-                        language=Parameters.language, 
-                        formatter_style=Parameters.formatter_style, 
-                        paragraph_config={
-                            'font': 'CodeVideoRendererFont',
-                            'line_spacing': Parameters.line_spacing
-                        }
-                    ).submobjects[1:3]
-                line_number_mobject.set_color(GREY)
-
-                total_line_numbers = len(self.code_str_lines)
-                total_char_numbers = len(''.join(line.strip() for line in self.code_str_lines))
-
-                # 调整代码对齐（manim内置bug）
-                offset_lines = []
-                for line_index, line in enumerate(self.code_str_lines):
-                    if all(check in "acegmnopqrsuvwxyz+,-.:;<=>_~ " for check in line):
-                        if line_index == 0:
-                            code_mobject.shift(DOWN*CODE_OFFSET)
-                        offset_lines.append(line_index)
-                del line_index, line
-                    
+                tracer = self._tracer
+                layout: LazyCodeLayout | None = None
+                if self._options.lazy_layout:
+                    # 惰性排版：按行网格逐块创建代码行，只在光标到达时排版
+                    with tracer.span('code', lines=self._plan.line_count, lazy=True):
+                        layout = LazyCodeLayout(
+                            self._code_str,
+                            self._plan.max_line_width*2,
+                            self._parameters.language,
+                            self._parameters.formatter_style,
+                            self._parameters.line_spacing,
+                            self._layout_cache
+                        )
+                    line_number_mobject, code_mobject = layout.numbers, layout.code
+                    # 视口裁剪使用行网格给出的各行上下界
+                    line_tops, line_bottoms, line_numbers_x = layout.tops, layout.bottoms, layout.numbers_x
+                else:
+                    with tracer.span('code', lines=self._plan.line_count) as span:
+                        numbers, code, span['source'] = self._codeLayout()
+                    numbers.set_color(GREY)
+                    # 调整代码对齐（manim内置bug），惰性排版按行网格对齐，不需要调整
+                    if self._plan.offset_lines[0]:
+                        code.shift(DOWN*CODE_OFFSET)
+                    # 视口裁剪使用的各行上下边界
+                    line_bounds = [Group(code[line], numbers[line]) for line in range(self._plan.line_count)]
+                    line_tops = np.array([group.get_top()[1] for group in line_bounds])
+                    line_bottoms = np.array([group.get_bottom()[1] for group in line_bounds])
+                    del line_bounds
+                    line_numbers_x = numbers.get_x()
+                    line_number_mobject, code_mobject = numbers, code
+
+                # 渲染循环中使用的设置绑定为局部变量
+                plan, viewport_culling, freeze_lines = self._plan, self._options.viewport_culling, self._options.freeze_lines
+                # 低帧率下每次按键至少占一帧，打字随之变慢
+                minimum_delay = 1 / config.frame_rate
+                total_line_numbers = plan.line_count
+                offset_lines = plan.offset_lines.tolist()
+                segment_start, segment_stop = self._segment or (0, total_line_numbers)
+
                 # 创建代码行矩形框
                 code_line_rectangle = SurroundingRectangle(
-                    VGroup(code_mobject[-1], line_number_mobject[-1]), # type: ignore[reportArgumentType]
+                    VGroup(code_mobject[-1], line_number_mobject[-1]) if layout is None else layout.reference, # type: ignore[reportArgumentType]
                     color="#333333",
                     fill_opacity=1,
                     stroke_width=0
                 ).set_y(code_mobject[0].get_y())
                 # 处理第一行出现代码偏移时的code_line_rectangle偏移问题
-                if 0 in offset_lines:
+                if offset_lines[0]:
                     code_line_rectangle.shift(UP*CODE_OFFSET/2)
                 
                 # 初始化光标位置
@@ -167,33 +262,119 @@ class CameraFollowCursorCV:
                 if config.renderer == RendererType.OPENGL:
                     scene.camera.frame = scene.camera # type: ignore[reportAttributeAccessIssue]
 
-                # 入场动画
-                target_center = cursor.get_center()
-                start_center = target_center + UP * 3
-                scene.camera.frame.scale(Parameters.camera_scale).move_to(start_center) # type: ignore[reportAttributeAccessIssue]
-                scene.add(code_line_rectangle, line_number_mobject[0].set_color(WHITE), cursor)
+                # 光栅合成模式下只记录相机轨迹与显示顺序
+                if scene.recorder is not None:
+                    scene.recorder.attach(cursor, code_line_rectangle)
+                    scene.recorder.beginLine(0, line_number_mobject[0])
+
+                # 视口裁剪：只保留与当前及下一个取景框相交的代码行
+                line_mobjects: list[list[Mobject]] = [[line_number_mobject[0]]]
+                shown_mobjects: dict[Mobject, None] = dict.fromkeys(line_mobjects[0])
+                def showMobject(line: int, mobject: Mobject):
+                    scene.add(mobject)
+                    line_mobjects[line].append(mobject)
+                    shown_mobjects[mobject] = None
+
+                def cullViewport(*frames: Mobject):
+                    top = max(frame.get_top()[1] for frame in frames)
+                    bottom = min(frame.get_bottom()[1] for frame in frames)
+                    current_line = len(line_mobjects) - 1
+                    first = int(np.searchsorted(-line_bottoms, -top, side='left'))
+                    last = int(np.searchsorted(-line_tops, -bottom, side='right'))
+                    visible_lines = set(range(min(first, current_line), min(last, current_line + 1)))
+                    visible_lines.add(current_line)
+                    if layout is not None:
+                        for block_start in {line - line % DEFAULT_FROZEN_BLOCK_LINES for line in visible_lines} & released_blocks:
+                            restoreBlock(block_start)
+                    visible_mobjects = dict.fromkeys(mobject for line in sorted(visible_lines) for mobject in line_mobjects[line])
+                    hidden_mobjects = [mobject for mobject in shown_mobjects if mobject not in visible_mobjects]
+                    if hidden_mobjects:
+                        scene.remove(*hidden_mobjects)
+                    appeared_mobjects = [mobject for mobject in visible_mobjects if mobject not in shown_mobjects]
+                    if appeared_mobjects:
+                        scene.add(*appeared_mobjects)
+                    shown_mobjects.clear()
+                    shown_mobjects.update(visible_mobjects)
+                    if layout is not None:
+                        for block_start in [block_start for block_start in complete_blocks if block_start + 2 * DEFAULT_FROZEN_BLOCK_LINES <= first]:
+                            releaseBlock(block_start)
+
+                # 冻结已完成的代码行：行块完成时光栅化一次，之后每帧只需矢量渲染未完成行块中的行
+                frozen_ppu = config.pixel_width / (config.frame_width * self._parameters.camera_scale) * DEFAULT_FROZEN_LAYER_SUPERSAMPLE
+                frozen_key = (hash(self._code_str), self._parameters.language, self._parameters.formatter_style, self._parameters.line_spacing, frozen_ppu, self._options.lazy_layout)
+                line_vectors: list[list[Mobject]] = []
+                def freezeLine(line: int):
+                    line_vectors.append(line_mobjects[line])
+                    block_start = line - line % DEFAULT_FROZEN_BLOCK_LINES
+                    if line - block_start != DEFAULT_FROZEN_BLOCK_LINES - 1:
+                        return
+                    frozen = freezeMobjects(
+                        [mobject for vectors in line_vectors[block_start:line+1] for mobject in vectors],
+                        ppu=frozen_ppu,
+                        key=(*frozen_key, block_start, line)
+                    )
+                    for block_line in range(block_start, line + 1):
+                        for mobject in line_mobjects[block_line]:
+                            if mobject in shown_mobjects:
+                                scene.remove(mobject)
+                                del shown_mobjects[mobject]
+                        line_mobjects[block_line] = [frozen]
+                    # 行块完成后不再需要其中各行的矢量对象
+                    line_vectors[block_start:line+1] = [[] for _ in range(DEFAULT_FROZEN_BLOCK_LINES)]
+                    if not viewport_culling:
+                        scene.add(frozen)
+                        shown_mobjects[frozen] = None
+
+                # 惰性排版：视口上方较远的已完成行块被释放，回到视口中时按打字计划重新创建
+                complete_blocks: set[int] = set()
+                released_blocks: set[int] = set()
+                def releaseBlock(block_start: int):
+                    for block_line in range(block_start, block_start + DEFAULT_FROZEN_BLOCK_LINES):
+                        for mobject in line_mobjects[block_line]:
+                            if mobject in shown_mobjects:
+                                scene.remove(mobject)
+                                del shown_mobjects[mobject]
+                        line_mobjects[block_line] = []
+                    complete_blocks.discard(block_start)
+                    released_blocks.add(block_start)
+
+                def restoreBlock(block_start: int):
+                    block_lines = range(block_start, block_start + DEFAULT_FROZEN_BLOCK_LINES)
+                    vectors: list[list[Mobject]] = [
+                        [line_number_mobject[block_line], *(code_mobject[block_line][glyph] for glyph in plan.glyphs[plan.line_offsets[block_line]:plan.line_offsets[block_line+1]].tolist() if glyph >= 0)]
+                        for block_line in block_lines
+                    ]
+                    if freeze_lines:
+                        # 与打字时冻结的图层使用相同的对象、顺序与缓存键
+                        frozen = freezeMobjects([mobject for mobjects in vectors for mobject in mobjects], ppu=frozen_ppu, key=(*frozen_key, block_start, block_lines[-1]))
+                        vectors = [[frozen] for _ in block_lines]
+                    line_mobjects[block_start:block_lines.stop] = vectors
+                    released_blocks.discard(block_start)
+                    complete_blocks.add(block_start)
 
-                scene.play(
-                    scene.camera.frame.animate.move_to(target_center), # type: ignore[reportArgumentType, reportAttributeAccessIssue]
-                    run_time=1,
-                    rate_func=rate_functions.ease_out_cubic
-                )
-                
                 # 定义固定动画
                 scene.Animation_list: list[dict[str, Point3D | float]] = []
                 def linebreakAnimation():
                     scene.Animation_list.append({"move_to": cursor.get_center()})
 
-                camera_scale = Parameters.camera_scale
+                camera_scale = self._parameters.camera_scale
                 def JUDGE_cameraScaleAnimation():
                     nonlocal camera_scale
-                    distance = (scene.camera.frame.get_x() - line_number_mobject.get_x()) / 14.22 # type: ignore[reportAttributeAccessIssue]
+                    distance = (scene.camera.frame.get_x() - line_numbers_x) / 14.22 # type: ignore[reportAttributeAccessIssue]
                     if distance > camera_scale:
                         scene.Animation_list.append({"scale": distance/camera_scale})
                         camera_scale = distance
 
+                plays = 0
                 def playAnimation(**kwargs):
+                    nonlocal plays
                     if scene.Animation_list:
+                        plays += 1
+                        if scene.recorder is not None:
+                            scene.recorder.play(scene.camera.frame, scene.Animation_list, **kwargs) # type: ignore[reportAttributeAccessIssue]
+                            scene.Animation_list.clear()
+                            return
+
                         cameraAnimation = scene.camera.frame.animate # type: ignore[reportAttributeAccessIssue]
 
                         for anim in scene.Animation_list:
@@ -201,168 +382,609 @@ class CameraFollowCursorCV:
                                 cameraAnimation.move_to(anim["move_to"])
                             elif "scale" in anim:
                                 cameraAnimation.scale(anim["scale"])
-                        
+
+                        if viewport_culling:
+                            cullViewport(scene.camera.frame, scene.camera.frame.target) # type: ignore[reportAttributeAccessIssue]
                         scene.play(cameraAnimation, **kwargs)
                         scene.Animation_list.clear()
                         del cameraAnimation
 
-                with copy(DefaultProgressBar(self.output)) as progress:
-                    total_progress = progress.add_task(description="[yellow]Total[/yellow]", total=total_char_numbers)
+                # 分段渲染：跳过本段之前的动画，跳过的动画直接应用最终状态，从而重建段首的相机、光标与已显示的字符
+                if segment_start:
+                    scene.next_section(skip_animations=True)
+
+                # 入场动画
+                target_center = cursor.get_center()
+                start_center = target_center + UP * 3
+                scene.camera.frame.scale(self._parameters.camera_scale).move_to(start_center) # type: ignore[reportAttributeAccessIssue]
+                scene.add(code_line_rectangle, line_number_mobject[0].set_color(WHITE), cursor)
+
+                scene.Animation_list.append({"move_to": target_center})
+                playAnimation(run_time=1, rate_func=rate_functions.ease_out_cubic)
+
+                def encodedFrames() -> int | None:
+                    # 已写入编码器的帧数，光栅化引擎录制时没有编码器
+                    encoder = scene.renderer.file_writer.__dict__.get('encoder')
+                    return encoder.frame_count if encoder is not None else None
+
+                with self._progress.task("Total", len(plan), 'characters', frames=encodedFrames) as total_progress:
 
                     # 遍历代码行
                     for line in range(total_line_numbers):
 
-                        line_number_mobject.set_color(GREY)
-                        line_number_mobject[line].set_color(WHITE)
-
-                        char_num = len(self.code_str_lines[line].strip())
-                        current_line_progress = progress.add_task(description=f"[green]Line {line+1}[/green]", total=char_num)
-
-                        code_line_rectangle.set_y(code_mobject[line].get_y())
-                        # 处理出现代码偏移时的code_line_rectangle偏移问题
-                        if line in offset_lines:
-                            code_line_rectangle.shift(UP*CODE_OFFSET/2)
-                        scene.add(line_number_mobject[line])
-
-                        cursor.align_to(code_mobject[line], LEFT).set_y(code_line_rectangle.get_y())
-                        if line != 0:
-                            linebreakAnimation()
-                        JUDGE_cameraScaleAnimation()
-                        playAnimation(run_time=DEFAULT_LINE_BREAK_RUN_TIME)
-
-                        # 如果当前行为空行，跳过
-                        if line in self.empty_line_positions:
-                            progress.remove_task(current_line_progress)
-                            continue
-                        
-                        first_non_space_index = len(self.code_str_lines[line]) - len(self.code_str_lines[line].lstrip())
-                        total_typing_chars = char_num # 当前行实际要打的字数
-
-                        # 遍历当前行的每个字符
-                        submobjects_char_index = 0
-                        for column in range(first_non_space_index, char_num + first_non_space_index):
-                            # 处理manim==0.19.1更新出现的空格消失问题
-                            if not self.code_str_lines[line][column].isspace():
-                                if [line, column] not in self.space_positions:
-                                    scene.add(code_mobject[line][submobjects_char_index])
-                                submobjects_char_index += 1
-                            cursor.next_to(
-                                code_mobject[line][submobjects_char_index-1],
-                                RIGHT,
-                                buff=DEFAULT_CURSOR_TO_CHAR_BUFFER
-                            ).set_y(code_line_rectangle.get_y())
-                            
-                            # 相机持续摆动逻辑
-                            line_break = False
-                            if column == first_non_space_index and first_non_space_index != 0:
-                                # 如果是缩进后的第一个字符，先执行换行归位
-                                linebreakAnimation()
-                                line_break = True
+                        if line == segment_stop:
+                            raise EndSceneEarlyException()
+                        with tracer.span('line', line=line):
+                            if line == segment_start and line != 0:
+                                scene.next_section()
+
+                            if line != 0:
+                                line_number_mobject[line-1].set_color(GREY)
+                            line_number_mobject[line].set_color(WHITE)
+
+                            keystrokes = range(plan.line_offsets[line], plan.line_offsets[line+1])
+                            line_progress = total_progress.section(f"Line {line+1}", len(keystrokes))
+
+                            code_line_rectangle.set_y(code_mobject[line].get_y())
+                            # 处理出现代码偏移时的code_line_rectangle偏移问题
+                            if offset_lines[line]:
+                                code_line_rectangle.shift(UP*CODE_OFFSET/2)
+                            if line != 0:
+                                if freeze_lines and scene.recorder is None:
+                                    freezeLine(line - 1)
+                                line_mobjects.append([])
+                                showMobject(line, line_number_mobject[line])
                             else:
-                                # 计算当前行的进度 (0.0 -> 1.0)
-                                current_idx = column - first_non_space_index
-                                max_idx = total_typing_chars - 1
-                                
-                                if max_idx > 0:
-                                    alpha = current_idx / max_idx
-                                else:
-                                    alpha = 1.0
-                                
-                                # 包络线 sin(alpha * pi)，确保头尾为0
-                                envelope = np.sin(alpha * np.pi)
-                                
-                                # 振荡项: sin(alpha * omega)
-                                wave_count = total_typing_chars / 15
-                                omega = wave_count * 2 * np.pi
-                                oscillation = np.sin(alpha * omega)
-                                
-                                # 振幅为相机框高度的 2.5%
-                                amplitude = scene.camera.frame.height * 0.025 # type: ignore[reportAttributeAccessIssue]
-                                offset_y = amplitude * envelope * oscillation
-                                
-                                target_pos = cursor.get_center() + UP * offset_y
-                                scene.Animation_list.append({"move_to": target_pos})
-
-                            # 缩放检测 & 播放
+                                scene.add(line_number_mobject[line])
+                            if layout is not None:
+                                if line % DEFAULT_FROZEN_BLOCK_LINES == 0 and line:
+                                    complete_blocks.add(line - DEFAULT_FROZEN_BLOCK_LINES)
+                                layout.release(line)
+                            if scene.recorder is not None:
+                                scene.recorder.beginLine(line, line_number_mobject[line])
+
+                            cursor.align_to(code_mobject[line], LEFT).set_y(code_line_rectangle.get_y())
+                            if line != 0:
+                                linebreakAnimation()
                             JUDGE_cameraScaleAnimation()
-                            playAnimation(
-                                run_time=DEFAULT_LINE_BREAK_RUN_TIME if line_break else random.uniform(*Parameters.interval_range),
-                                rate_func=rate_functions.smooth if line_break else rate_functions.linear
-                            )
+                            playAnimation(run_time=DEFAULT_LINE_BREAK_RUN_TIME)
+
+                            # 遍历当前行的每个字符（空行没有按键）
+                            for glyph, anchor, delay, line_break, camera_offset in zip(
+                                plan.glyphs[keystrokes.start:keystrokes.stop].tolist(),
+                                plan.anchors[keystrokes.start:keystrokes.stop].tolist(),
+                                np.maximum(plan.delays[keystrokes.start:keystrokes.stop], minimum_delay).tolist(),
+                                plan.line_breaks[keystrokes.start:keystrokes.stop].tolist(),
+                                plan.camera_offsets[keystrokes.start:keystrokes.stop].tolist()
+                            ):
+                                # 处理manim==0.19.1更新出现的空格消失问题
+                                if glyph >= 0:
+                                    showMobject(line, code_mobject[line][glyph])
+                                    if scene.recorder is not None:
+                                        scene.recorder.reveal(code_mobject[line][glyph])
+                                cursor.next_to(
+                                    code_mobject[line][anchor],
+                                    RIGHT,
+                                    buff=DEFAULT_CURSOR_TO_CHAR_BUFFER
+                                ).set_y(code_line_rectangle.get_y())
+                            
+                                # 相机持续摆动逻辑
+                                if line_break:
+                                    # 如果是缩进后的第一个字符，先执行换行归位
+                                    linebreakAnimation()
+                                else:
+                                    # 包络振荡，振幅为相机框高度的 2.5%
+                                    offset_y = scene.camera.frame.height * DEFAULT_CAMERA_WAVE_AMPLITUDE * camera_offset # type: ignore[reportAttributeAccessIssue]
+                                    scene.Animation_list.append({"move_to": cursor.get_center() + UP * offset_y})
+
+                                # 缩放检测 & 播放
+                                JUDGE_cameraScaleAnimation()
+                                playAnimation(
+                                    run_time=delay,
+                                    rate_func=rate_functions.smooth if line_break else rate_functions.linear
+                                )
 
-                            # 输出进度
-                            progress.advance(total_progress, advance=1)
-                            progress.advance(current_line_progress, advance=1)
+                                # 输出进度
+                                line_progress.advance()
 
-                        progress.remove_task(current_line_progress)
-                    progress.remove_task(total_progress)
+                            line_progress.close()
 
-                scene.wait()
+                        # 每行结束时的计数
+                        tracer.counter('plays', plays)
+                        tracer.counter('mobjects', len(scene.mobjects))
+                        tracer.counter('peak_rss', peakRss())
+
+                if scene.recorder is not None:
+                    scene.recorder.wait(scene.camera.frame) # type: ignore[reportAttributeAccessIssue]
+                else:
+                    scene.wait()
 
             def render(scene):
                 """Override render to add timing log."""
-                if self.output:
-                    DEFAULT_OUTPUT_CONSOLE.log(f"Start rendering {Parameters.video_name}.mp4.")
+                if self._output:
+                    DEFAULT_OUTPUT_CONSOLE.log(f"Start rendering {self._parameters.video_name}.mp4.")
                     DEFAULT_OUTPUT_CONSOLE.log("Start rendering CameraFollowCursorCVScene. [dim](by manim)[/]")
-                    if config.renderer == RendererType.CAIRO:
+                    if self._options.engine == 'raster':
+                        DEFAULT_OUTPUT_CONSOLE.log('[blue]Currently using raster compositing (NumPy) for rendering.[/]')
+                    elif config.renderer == RendererType.CAIRO:
                         DEFAULT_OUTPUT_CONSOLE.log('[blue]Currently using CPU (Cairo Renderer) for rendering.[/]')
                     else:
                         DEFAULT_OUTPUT_CONSOLE.log('[blue]Currently using GPU (OpenGL Renderer) for rendering.[/]')
                     DEFAULT_OUTPUT_CONSOLE.log("Manim's config has been modified.")
+                    if self._options.glow_mode == 'stream':
+                        DEFAULT_OUTPUT_CONSOLE.log("The glow effect is applied to the frames while they are encoded.")
                 
+                scene.reused_frames = 0
+
+                # 整个场景的帧通过管道交给同一个ffmpeg进程编码
+                file_writer = scene.renderer.file_writer
+                attachEncoder(file_writer, self._encoder, self._stream)
+
+                # 流式发光：在manim的写入线程中处理原始帧，每帧只编码一次（分段渲染时由各进程处理）
+                scene.glow = GlowCache(GlowKernel()) if self._options.glow_mode == 'stream' else None
+                if scene.glow is not None and self._options.engine != 'raster' and self._options.segments == 1 and not self._options.incremental:
+                    glow = scene.glow
+                    # 包装的是attachEncoder替换后的encode_and_write_frame，不依赖manim内部的签名
+                    encode_and_write_frame = file_writer.encode_and_write_frame # type: ignore[reportAttributeAccessIssue]
+                    file_writer.encode_and_write_frame = lambda frame, num_frames: encode_and_write_frame(glow(frame), num_frames) # type: ignore[reportAttributeAccessIssue]
+
+                # 追踪：构建循环（可选cProfile分析）与等待编码完成的时间
+                tracer = self._tracer
+                if tracer.enabled:
+                    construct = scene.construct
+                    def tracedConstruct():
+                        with tracer.span('construct'), tracer.profile():
+                            construct()
+                    scene.construct = tracedConstruct
+                    file_writer.combine_to_movie = tracer.wrap('encoding', file_writer.combine_to_movie)
+
                 # 渲染并计算时间
-                with noManimOutput():
-                    total_render_time = timeit(super().render, number=1)
-                if self.output:
+                try:
+                    with noManimOutput(), tracer.span('render', engine=self._options.engine, renderer=self._parameters.renderer):
+                        if self._options.engine == 'raster':
+                            total_render_time = timeit(scene.rasterRender, number=1)
+                        elif self._options.segments > 1 or self._options.incremental:
+                            total_render_time = timeit(scene.segmentedRender, number=1)
+                        else:
+                            total_render_time = timeit(super().render, number=1)
+                finally:
+                    detachEncoder(file_writer)
+                    scene.__dict__.pop('construct', None)
+                if tracer.enabled and self._stream is None:
+                    tracer.counter('frames', countFrames(file_writer.movie_file_path))
+                if self._output:
                     DEFAULT_OUTPUT_CONSOLE.log(f"Successfully rendered CameraFollowCursorCVScene in {total_render_time:,.2f} seconds. [dim](by manim)[/]")
                 del total_render_time
 
-                # 恢复配置
-                config.disable_caching = self.origin_config['disable_caching']
-                config.renderer = self.origin_config['renderer']
-                if self.output:
-                    DEFAULT_OUTPUT_CONSOLE.log("Manim's config has been restored.")
-                del self.origin_config
-                if self.output:
-                    DEFAULT_OUTPUT_CONSOLE.log(f"Start adding glow effect to CameraFollowCursorCVScene.mp4. [dim](by moviepy)[/]\n")
-
-                # 添加发光效果
-                input_path = str(scene.renderer.file_writer.movie_file_path)
-                output_path = '\\'.join(input_path.split('\\')[:-1]) + rf'\{Parameters.video_name}.mp4'
-                total_effect_time = timeit(lambda: addGlowEffect(input_path=input_path, output_path=output_path, output=self.output), number=1)
-                if self.output:
-                    DEFAULT_OUTPUT_CONSOLE.log(f"Successfully added glow effect in {total_effect_time:,.2f} seconds. [dim](by moviepy)[/]")
-                    DEFAULT_OUTPUT_CONSOLE.log(f"File ready at '{output_path}'.")
-                del input_path, output_path, total_effect_time
+            def rasterRender(scene):
+                """Record the animation without rendering it, then composite every frame from pre-rasterized layers."""
+                scene.recorder = RasterRecorder()
+                try:
+                    scene.setup()
+                    scene.construct()
+                    scene.tear_down()
+                    with self._tracer.span('raster'):
+                        RasterEngine(scene.recorder).write(
+                            self._stream if self._stream is not None else str(scene.renderer.file_writer.movie_file_path),
+                            output=self._output,
+                            frame_filter=scene.glow,
+                            encoder=self._encoder,
+                            progress=self._progress
+                        )
+                finally:
+                    scene.recorder = None
+
+            def segmentedRender(scene):
+                """Render line ranges of the animation in separate processes, then concatenate the segment videos. Incremental renders reuse the cached line blocks."""
+                movie_path = Path(scene.renderer.file_writer.movie_file_path)
+                with TemporaryDirectory(dir=movie_path.parent) as segment_dir:
+                    # 增量渲染总是带有缓存
+                    cache = self._cache if self._options.incremental else None
+                    segment_paths: list[Path | None]
+                    if cache is not None:
+                        # 按固定行数分块，编辑之前的块的键保持不变
+                        stops = [*range(DEFAULT_INCREMENTAL_CHUNK_LINES, self._plan.line_count, DEFAULT_INCREMENTAL_CHUNK_LINES), self._plan.line_count]
+                        segments = list(zip([0, *stops[:-1]], stops))
+                        keys = self._segmentKeys(segments)
+                        # 命中的分块链接到临时目录中，拼接前被其他渲染淘汰也能读取
+                        segment_paths = [cache.checkout(key, segment_dir) for key in keys]
+                    else:
+                        segments = self._plan.segments(self._options.segments)
+                        keys = []
+                        segment_paths = [None] * len(segments)
+                    missing = [index for index, path in enumerate(segment_paths) if path is None]
+                    parameters = {
+                        'language': self._parameters.language,
+                        'formatter_style': self._parameters.formatter_style,
+                        'line_spacing': self._parameters.line_spacing,
+                        'camera_scale': self._parameters.camera_scale,
+                        'video_name': self._parameters.video_name,
+                        'renderer': self._parameters.renderer
+                    }
+                    # 各进程在一个进程内串行渲染自己的行范围
+                    options = replace(self._options, engine='manim', glow_workers=1, segments=1, incremental=False, encoder=self._encoder)
+                    settings = {
+                        'layout_cache': self._layout_cache,
+                        # 增量渲染的分块在缓存前各自添加发光效果
+                        'glow_segment': self._options.incremental and self._options.glow_mode in ('post', 'parallel')
+                    }
+                    if self._output and self._options.incremental:
+                        DEFAULT_OUTPUT_CONSOLE.log(f"Reused {len(segments) - len(missing):,} of {len(segments):,} line blocks from the render cache.")
+
+                    if missing:
+                        # 各进程读取同一份打字计划，保证打字间隔与串行渲染一致
+                        plan_path = os.path.join(segment_dir, 'plan.npz')
+                        self._plan.save(plan_path)
+                        # 先在本进程中排版代码并写入缓存，各进程直接读取，不必各自排版
+                        if self._layout_cache is not None and not self._options.lazy_layout and len(missing) > 1:
+                            with self._tracer.span('code', lines=self._plan.line_count) as span:
+                                span['source'] = self._codeLayout()[2]
+                        with self._tracer.span('segments', count=len(missing)), ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor, self._progress.task("Segments", len(missing), 'segments') as progress:
+                            futures = {
+                                executor.submit(_renderSegment, config.copy(), parameters, plan_path, segments[index], os.path.join(segment_dir, f"segment_{index:05d}"), options, settings): index
+                                for index in missing
+                            }
+                            for future in as_completed(futures):
+                                path, hits = future.result()
+                                index = futures[future]
+                                if cache is not None:
+                                    cache.put(keys[index], path)
+                                segment_paths[index] = Path(path)
+                                scene.reused_frames += hits
+                                progress.advance()
+                    with self._tracer.span('encoding', step='concat'):
+                        # 此时每个分块都已渲染或取自缓存
+                        concatVideos([path for path in segment_paths if path is not None], movie_path)
 
         return CameraFollowCursorCVScene()
     
+    def _finishVideo(self, output_path: Path | BinaryOutput):
+        """Add the glow effect to the rendered video unless it was added while rendering, and move it to `output_path` or write it to a stream."""
+        scene = self._scene
+        input_path = Path(scene.renderer.file_writer.movie_file_path)
+        if scene.glow is not None or self._options.incremental or self._options.glow_mode == 'none':
+            # 发光效果已在渲染时（或在各分块中）添加，或者不需要添加
+            if isinstance(output_path, Path):
+                shutil.move(input_path, output_path)
+            elif self._stream is None:
+                concatVideos([input_path], output_path)
+            reused_frames = scene.reused_frames + (scene.glow.hits if scene.glow is not None else 0)
+            scene.glow = None
+        else:
+            # 添加发光效果
+            if self._output:
+                DEFAULT_OUTPUT_CONSOLE.log(f"Start adding glow effect to CameraFollowCursorCVScene.mp4. [dim](by ffmpeg)[/]\n")
+            start_time = perf_counter()
+            with self._tracer.span('glow', mode=self._options.glow_mode) as span:
+                reused_frames = addGlowEffect(
+                    input_path=str(input_path),
+                    output_path=str(output_path) if isinstance(output_path, Path) else output_path,
+                    output=self._output,
+                    workers=self._options.glow_workers if self._options.glow_mode == 'parallel' else 1,
+                    encoder=self._encoder,
+                    progress=self._progress
+                )
+                span['reused_frames'] = reused_frames
+            total_effect_time = perf_counter() - start_time
+            if self._output:
+                DEFAULT_OUTPUT_CONSOLE.log(f"Successfully added glow effect in {total_effect_time:,.2f} seconds. [dim](by ffmpeg)[/]")
+            del start_time, total_effect_time
+        if self._output:
+            DEFAULT_OUTPUT_CONSOLE.log(f"Reused the glow effect of {reused_frames:,} duplicate frames.")
+            if isinstance(output_path, Path):
+                DEFAULT_OUTPUT_CONSOLE.log(f"File ready at '{output_path}'.")
+            else:
+                DEFAULT_OUTPUT_CONSOLE.log("The video has been written to the output stream.")
+
+    def _codeLayout(self) -> tuple[Mobject, Mobject, str]:
+        """Build or load the line numbers and code mobjects, see `codeLayout`."""
+        # 末尾的占位行使代码块足够宽，光标移动到行尾时不会超出代码块
+        return codeLayout(
+            self._code_str + f"\n{(self._plan.max_line_width*2)*' ' + OCCUPY_CHARACTER}",
+            self._parameters.language,
+            self._parameters.formatter_style,
+            self._parameters.line_spacing,
+            self._layout_cache
+        )
+
+    def _cacheFields(self) -> dict:
+        """Collect the settings that influence every frame of the video, for the render cache keys."""
+        from . import __version__
+        return dict(
+            language=self._parameters.language,
+            formatter_style=self._parameters.formatter_style,
+            line_spacing=self._parameters.line_spacing,
+            interval_range=list(self._plan.interval_range),
+            camera_scale=self._parameters.camera_scale,
+            renderer=self._parameters.renderer,
+            seed=self._parameters.seed,
+            frame_rate=config.frame_rate,
+            resolution=[config.pixel_width, config.pixel_height],
+            version=__version__,
+            engine=self._options.engine,
+            viewport_culling=self._options.viewport_culling,
+            freeze_lines=self._options.freeze_lines,
+            lazy_layout=self._options.lazy_layout,
+            # 'post' 与 'parallel' 的输出相同
+            glow='post' if self._options.glow_mode == 'parallel' else self._options.glow_mode,
+            encoder=self._encoder.fields()
+        )
+
+    def _defaultOutputPath(self) -> Path:
+        """The path of `{video_name}.mp4` in manim's video directory, where `render` writes without a destination."""
+        module_name = Path(config.input_file).stem if config.input_file else ""
+        video_dir = Path(config.get_dir('video_dir', module_name=module_name))
+        video_dir.mkdir(parents=True, exist_ok=True)
+        return video_dir / f"{self._parameters.video_name}.mp4"
+
+    def _cacheKey(self) -> str:
+        """Compute the render cache key of the whole video."""
+        return RenderCache.key(
+            code=self._plan.code,
+            delays=hashlib.blake2b(self._plan.delays.tobytes(), digest_size=16).hexdigest(),
+            **self._cacheFields()
+        )
+
+    def _segmentKeys(self, segments: list[tuple[int, int]]) -> list[str]:
+        """Compute the render cache key of each line range, from the code and typing intervals up to its end."""
+        # 代码块的布局取决于总行数与最长行，其余内容只影响之后的行
+        fields = self._cacheFields()
+        return [
+            RenderCache.key(line_count=self._plan.line_count, max_line_width=self._plan.max_line_width, segment=list(segment), prefix=digest, **fields)
+            for segment, digest in zip(segments, self._plan.prefixDigests([stop for _, stop in segments]))
+        ]
+
     @typeChecker
-    def render(self, output: bool = DEFAULT_OUTPUT_VALUE):
+    def render(
+        self,
+        output: bool = DEFAULT_OUTPUT_VALUE,
+        options: RenderOptions | None = None,
+        cache: RenderCache | None = None,
+        destination: Union[StrPath, BinaryOutput, None] = None,
+        scratch_dir: StrPath | None = None,
+        progress: ProgressSink | None = None
+    ) -> Path | None:
         """
         Render the scene, optionally with console output.
 
+        Manim's config is only changed while this instance renders. Different instances can render in different
+        threads: the manim part of their renders runs one at a time, because manim's config and logger are
+        process-wide, while their glow passes run concurrently.
+
         Args:
             output (bool): Whether to print console output during rendering. Defaults to `DEFAULT_OUTPUT_VALUE`
+            options (RenderOptions | None): How the video is rendered: engine, culling, glow, segments, quality preset and encoder. Defaults to `None`, which uses `RenderOptions()`.
+            cache (RenderCache | None): The cache of rendered videos. An identical earlier render is copied instead of rendered again. Only renders with a `seed` or a typing plan are cached. The highlighted code layout is stored there too, for all renders, see `codeLayout`. Defaults to `None`.
+            destination (Union[StrPath, BinaryOutput, None]): Where the video is written. A path receives an MP4 file, a binary stream (a file object, a pipe or `sys.stdout.buffer`) receives a fragmented MP4 while it is produced. Defaults to `None`, which writes `{video_name}.mp4` to manim's media directory.
+            scratch_dir (StrPath | None): The directory for manim's intermediate files, which are kept there. Defaults to `None`, which uses manim's media directory, or a temporary directory that is deleted afterwards when `destination` is given.
+            progress (ProgressSink | None): Where the progress bars are reported, such as `NullProgress()` or `JsonLinesProgress()` for headless workers. Defaults to `None`, which shows Rich progress bars if `output` is set and the console is a terminal, and nothing otherwise.
+
+        Returns:
+            Path | None: The path of the output video, or `None` when it was written to a stream.
         """
-        self.output = output
-        self.scene.render()
+        options = options or RenderOptions()
+        if options.engine == 'raster' and self._parameters.renderer != 'cairo':
+            raise ValueError("The 'raster' engine can only be used with the 'cairo' renderer")
+        if (options.segments > 1 or options.incremental) and self._parameters.renderer != 'cairo':
+            raise ValueError("segments and incremental can only be used with the 'cairo' renderer")
+        if options.incremental and (cache is None or (self._parameters.seed is None and self._parameters.code[0] != 'plan')):
+            raise ValueError("incremental requires a cache and a seed or a typing plan")
+        preset = QUALITY_PRESETS[options.quality]
+        self._output = output
+        # 预设只决定未指定的发光模式
+        self._options = replace(options, glow_mode=options.glow_mode or preset['glow_mode'] or DEFAULT_GLOW_MODE)
+        self._encoder = options.encoder or EncoderConfig(**preset['encoder'])
+        self._progress = progress if progress is not None else defaultProgress(output)
+        self._segment: tuple[int, int] | None = None
+        self._stream: BinaryOutput | None = None
+        self._cache: RenderCache | None = cache
+        self._layout_cache: RenderCache | None = cache
+
+        # 指定了输出位置时，manim的中间文件默认放在临时目录中，渲染结束后删除
+        with ExitStack() as scratch:
+            # 渲染结束（包括失败）时记录峰值内存并导出追踪数据
+            scratch.callback(self._tracer.write)
+            scratch.callback(lambda: self._tracer.counter('peak_rss', peakRss()))
+            scene_config = {**self._scene_config, **preset['config']}
+            if scratch_dir is not None:
+                scene_config['media_dir'] = str(scratch_dir)
+            elif destination is not None:
+                scene_config['media_dir'] = scratch.enter_context(TemporaryDirectory(prefix='CodeVideoRenderer-'))
+            stream = destination if isinstance(destination, BinaryOutput) else None
+
+            # 场景在锁内按本实例的配置创建并渲染；发光效果在锁外添加，可以与其他实例的渲染同时进行
+            with _RENDER_LOCK:
+                with tempconfig(scene_config):
+                    # 只有打字间隔确定时才能复用缓存；命中时不创建场景
+                    cache_key = cached_path = None
+                    if cache is not None and (self._parameters.seed is not None or self._parameters.code[0] == 'plan'):
+                        cache_key = self._cacheKey()
+                        # 命中的视频链接到临时目录中，复制前被其他渲染淘汰也能读取
+                        cached_path = cache.checkout(cache_key, scratch.enter_context(TemporaryDirectory(prefix='CodeVideoRenderer-')))
+                    if cached_path is not None:
+                        output_path = Path(destination) if isinstance(destination, (str, os.PathLike)) else self._defaultOutputPath()
+                    else:
+                        # 不写入缓存且渲染后不再处理时，视频直接编码为分片MP4写入流
+                        direct = cache_key is None and self._options.glow_mode in ('stream', 'none') and self._options.segments == 1 and not self._options.incremental
+                        self._stream = stream if direct else None
+                        self._scene = self._create_scene()
+                        if isinstance(destination, (str, os.PathLike)):
+                            output_path = Path(destination)
+                        else:
+                            output_path = Path(self._scene.renderer.file_writer.movie_file_path).with_name(f"{self._parameters.video_name}.mp4")
+                        self._scene.render()
+                if self._output and cached_path is None:
+                    DEFAULT_OUTPUT_CONSOLE.log("Manim's config has been restored.")
+
+            if cached_path is not None:
+                if stream is not None:
+                    concatVideos([cached_path], stream)
+                else:
+                    shutil.copyfile(cached_path, output_path)
+                if self._output:
+                    DEFAULT_OUTPUT_CONSOLE.log(f"Reused the cached render of {self._parameters.video_name}.mp4.")
+                    if stream is None:
+                        DEFAULT_OUTPUT_CONSOLE.log(f"File ready at '{output_path}'.")
+                return output_path if stream is None else None
+
+            # 需要写入缓存时先输出到文件，再写入流
+            self._finishVideo(output_path if stream is None or cache_key is not None else stream)
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, output_path)
+                if stream is not None:
+                    concatVideos([output_path], stream)
+            return output_path if stream is None else None
     
-    def __getattribute__(self, name):
-        frames = inspect.stack()
-        is_internal_call = False
-        
-        for frame in frames[1:]:
-            frame_self = frame.frame.f_locals.get('self')
-            if isinstance(frame_self, CameraFollowCursorCV):
-                is_internal_call = True
-                break
-        
-        if not is_internal_call:
-            allowed_attrs = super().__getattribute__("__all__")
-            if name not in allowed_attrs:
-                raise AttributeError(f"'CameraFollowCursorCV' object has no attribute '{name}'")
-        
-        return super().__getattribute__(name)
+    @typeChecker
+    def frames(
+        self,
+        options: RenderOptions | None = None,
+        glow: bool = True,
+        buffer_size: int = DEFAULT_FRAME_BUFFER_SIZE
+    ) -> Generator[np.ndarray, None, None]:
+        """
+        Render the scene frame by frame without writing a video.
+
+        With the `'manim'` engine the frames are rendered in a background thread that runs at most `buffer_size`
+        frames ahead of the consumer. With the `'raster'` engine the animation is recorded and rasterized first, and
+        every frame is composited when it is requested. Rendering stops as soon as the generator is closed. Frames
+        are only available with the `'cairo'` renderer: the OpenGL renderer does not pass its frames through the
+        file writer.
 
-__all__ = ["CameraFollowCursorCV"]
\ No newline at end of file
+        Args:
+            options (RenderOptions | None): The engine, culling, frozen lines and lazy layout, see `RenderOptions`. The glow, segment, quality and encoder options do not apply to frames. Defaults to `None`, which uses `RenderOptions()`.
+            glow (bool): Whether to add the glow effect to the frames. Defaults to True.
+            buffer_size (int): The maximum number of rendered frames waiting to be consumed. Defaults to `DEFAULT_FRAME_BUFFER_SIZE`.
+
+        Returns:
+            Generator[np.ndarray, None, None]: The RGB uint8 frames at manim's resolution and frame rate. A frame that repeats the previous one may be the same read-only array.
+
+        Raises:
+            RuntimeError: If the `'manim'` engine is used and the installed manim is not version 0.19, see `checkFileWriter`.
+        """
+        options = options or RenderOptions()
+        if self._parameters.renderer != 'cairo':
+            raise ValueError("frames can only be used with the 'cairo' renderer")
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be greater than or equal to 1")
+        if options.engine != 'raster':
+            checkFileWriter()
+        self._output = False
+        self._progress = NullProgress()
+        self._layout_cache = None
+        self._options = options
+        self._segment = None
+        self._stream = None
+        glow_filter = GlowCache(GlowKernel()) if glow else None
+        if options.engine == 'raster':
+            return self._rasterFrames(glow_filter)
+        return self._manimFrames(glow_filter, buffer_size)
+
+    def _rasterFrames(self, glow: GlowCache | None) -> Generator[np.ndarray, None, None]:
+        """Record and rasterize the animation, then composite each frame when it is requested."""
+        with _RENDER_LOCK, tempconfig(self._scene_config):
+            self._scene = scene = self._create_scene()
+            scene.recorder = RasterRecorder()
+            try:
+                with noManimOutput():
+                    scene.setup()
+                    scene.construct()
+                    scene.tear_down()
+                engine = RasterEngine(scene.recorder)
+                engine.rasterize()
+            finally:
+                scene.recorder = None
+
+        # 合成帧只用到已光栅化的图层，不再需要manim的配置
+        for frame in engine.frames():
+            yield frame if glow is None else glow(frame)
+
+    def _manimFrames(self, glow: GlowCache | None, buffer_size: int) -> Generator[np.ndarray, None, None]:
+        """Render the animation with manim in a background thread, passing the frames through a bounded queue."""
+        frames: Queue = Queue(maxsize=buffer_size)
+        stopped = Event()
+        end = object()
+
+        def put(item) -> bool:
+            # 队列已满时定期检查消费者是否已经停止
+            while not stopped.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def writeFrame(frame: np.ndarray, num_frames: int = 1):
+            frame = np.ascontiguousarray(frame[..., :3])
+            if not put((frame if glow is None else glow(frame), num_frames)):
+                raise _FramesClosed()
+
+        def renderFrames():
+            try:
+                # 不写入视频文件，帧直接从文件写入器的入口取出
+                with _RENDER_LOCK, tempconfig({**self._scene_config, 'write_to_movie': False}):
+                    self._scene = scene = self._create_scene()
+                    # 替换manim 0.19的write_frame(frame, num_frames)，版本已由checkFileWriter检查
+                    scene.renderer.file_writer.write_frame = writeFrame # type: ignore[reportAttributeAccessIssue]
+                    with noManimOutput():
+                        MovingCameraScene.render(scene)
+            except _FramesClosed:
+                return
+            except BaseException as error:
+                put(error)
+                return
+            put(end)
+
+        thread = Thread(target=renderFrames, name="CameraFollowCursorCV.frames", daemon=True)
+        thread.start()
+        try:
+            while (item := frames.get()) is not end:
+                if isinstance(item, BaseException):
+                    raise item
+                frame, num_frames = item
+                for _ in range(num_frames):
+                    yield frame
+        finally:
+            stopped.set()
+            thread.join()
+
+    @property
+    def parameters(self) -> Parameters:
+        """The validated constructor arguments."""
+        return self._parameters
+
+    @property
+    def plan(self) -> TypingPlan:
+        """The typing plan of the code, which can be saved with `TypingPlan.save` and rendered again."""
+        return self._plan
+
+    @property
+    def tracer(self) -> Tracer:
+        """The tracer that receives the spans and counters of every render."""
+        return self._tracer
+
+def _renderSegment(scene_config, parameters: dict, plan_path: str, segment: tuple[int, int], media_dir: str, options: RenderOptions, settings: dict) -> tuple[str, int]:
+    """Render the lines `segment` of a saved typing plan in a worker process, returning the video path and the number of reused glow frames."""
+    with tempconfig(scene_config):
+        config.media_dir = media_dir
+        code_video = CameraFollowCursorCV(code=('plan', plan_path), **parameters)
+        code_video._output = False
+        code_video._progress = NullProgress()
+        code_video._options = options
+        code_video._encoder = options.encoder or EncoderConfig()
+        code_video._segment = segment
+        code_video._stream = None
+        code_video._cache = None
+        code_video._layout_cache = settings['layout_cache']
+        with _RENDER_LOCK, tempconfig(code_video._scene_config):
+            code_video._scene = code_video._create_scene()
+            code_video._scene.render()
+        scene = code_video._scene
+        movie_path = str(scene.renderer.file_writer.movie_file_path)
+        if settings['glow_segment']:
+            glow_path = str(Path(movie_path).with_name('glow.mp4'))
+            return glow_path, addGlowEffect(input_path=movie_path, output_path=glow_path, output=False, encoder=code_video._encoder, progress=NullProgress())
+        return movie_path, scene.glow.hits if scene.glow is not None else 0
+
+__all__ = ["CameraFollowCursorCV", "RenderOptions"]
\ No newline at end of file
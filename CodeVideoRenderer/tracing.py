@@ -0,0 +1,207 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock, current_thread
+from time import perf_counter
+from typing import Any, Callable, Generator, Union
+from pathlib import Path
+import cProfile, pstats, json, os, sys
+
+from .typing import StrPath
+
+@dataclass(frozen=True)
+class Span:
+    """
+    A timed stage of a render.
+
+    Attributes:
+        name (str): The stage.
+        start (float): The `time.perf_counter` value when the stage started, in seconds.
+        duration (float): The duration of the stage, in seconds.
+        thread (str): The name of the thread the stage ran in.
+        attributes (dict[str, Any]): Details of the stage, such as the line of a `'line'` span.
+    """
+    name: str
+    start: float
+    duration: float
+    thread: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class CounterSample:
+    """
+    The value of a counter at a point of a render.
+
+    Attributes:
+        name (str): The counter.
+        time (float): The `time.perf_counter` value when it was sampled, in seconds.
+        value (float): The value.
+    """
+    name: str
+    time: float
+    value: float
+
+TraceEvent = Union[Span, CounterSample]
+
+def peakRss() -> int | None:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        int | None: The peak resident set size in bytes, or `None` on platforms without the `resource` module.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+class Tracer:
+    """
+    Collect timed spans and counters of renders.
+
+    Every event is kept in `events` and passed to `callback` as soon as it is complete. Spans of the same thread
+    nest: a span that starts inside another one ends before it. A tracer can be shared by several instances and
+    threads.
+
+    `CameraFollowCursorCV` emits the spans `'preprocess'` (reading the code and compiling the typing plan),
+    `'code'` (building the code layout, whose `source` tells whether it was cached, see `codeLayout`),
+    `'construct'`, `'line'` (one per code line), `'render'`, `'raster'`, `'segments'`, `'encoding'` and
+    `'glow'`, and the counters `'plays'`, `'mobjects'` (in the scene
+    after each line), `'frames'` and `'peak_rss'` (in bytes). Segments rendered in other processes are not traced.
+
+    Args:
+        callback (Callable[[TraceEvent], None] | None): A function called with every `Span` and `CounterSample`. Defaults to `None`.
+        trace_path (StrPath | None): A file that the events are written to as a Chrome trace (viewable in
+            `chrome://tracing` or Perfetto) after every render. Defaults to `None`.
+        profile_path (StrPath | None): A file that the `cProfile` statistics of the construct loop are written
+            to after every render, readable with `pstats`. Defaults to `None`, which does not profile.
+        enabled (bool): Whether events are recorded at all. Defaults to True.
+    """
+    def __init__(self, callback: Callable[[TraceEvent], None] | None = None, trace_path: StrPath | None = None, profile_path: StrPath | None = None, enabled: bool = True):
+        self.callback = callback
+        self.trace_path = Path(trace_path) if trace_path is not None else None
+        self.profile_path = Path(profile_path) if profile_path is not None else None
+        self.enabled = enabled
+        self.events: list[TraceEvent] = []
+        self.stats: pstats.Stats | None = None
+        self._lock = Lock()
+
+    def _emit(self, event: TraceEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Generator[dict[str, Any], None, None]:
+        """
+        Time the body of the context as a span.
+
+        Args:
+            name (str): The stage.
+            **attributes (Any): Details of the stage. More can be added to the yielded dictionary before the span ends.
+
+        Yields:
+            dict[str, Any]: The attributes of the span.
+        """
+        if not self.enabled:
+            yield attributes
+            return
+        start = perf_counter()
+        try:
+            yield attributes
+        finally:
+            self._emit(Span(name, start, perf_counter() - start, current_thread().name, attributes))
+
+    def wrap(self, name: str, function: Callable[..., Any], **attributes: Any) -> Callable[..., Any]:
+        """
+        Wrap a function so that every call is timed as a span.
+
+        Args:
+            name (str): The stage.
+            function (Callable[..., Any]): The function.
+            **attributes (Any): Details of the stage.
+
+        Returns:
+            Callable[..., Any]: The wrapped function, or `function` itself if the tracer is disabled.
+        """
+        if not self.enabled:
+            return function
+        def traced(*args, **kwargs):
+            with self.span(name, **attributes):
+                return function(*args, **kwargs)
+        return traced
+
+    def counter(self, name: str, value: float | None) -> None:
+        """
+        Record the value of a counter. `None` values are ignored.
+
+        Args:
+            name (str): The counter.
+            value (float | None): The value.
+        """
+        if self.enabled and value is not None:
+            self._emit(CounterSample(name, perf_counter(), value))
+
+    @contextmanager
+    def profile(self) -> Generator[None, None, None]:
+        """Run the body of the context under `cProfile` if `profile_path` is set, adding to `stats`."""
+        if not self.enabled or self.profile_path is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+
+    def chromeTrace(self) -> dict[str, Any]:
+        """
+        Convert the events to the Chrome trace event format.
+
+        Returns:
+            dict[str, Any]: The trace, with complete events for the spans and counter events for the counters.
+        """
+        pid = os.getpid()
+        threads: dict[str, int] = {}
+        trace_events: list[dict[str, Any]] = []
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            if isinstance(event, Span):
+                tid = threads.setdefault(event.thread, len(threads) + 1)
+                trace_events.append({
+                    'name': event.name, 'cat': 'render', 'ph': 'X', 'pid': pid, 'tid': tid,
+                    'ts': event.start * 1e6, 'dur': event.duration * 1e6,
+                    'args': {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value) for key, value in event.attributes.items()}
+                })
+            else:
+                trace_events.append({'name': event.name, 'ph': 'C', 'pid': pid, 'ts': event.time * 1e6, 'args': {event.name: event.value}})
+        # 线程名称元数据
+        trace_events.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}} for name, tid in threads.items())
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write(self) -> None:
+        """Write the Chrome trace to `trace_path` and the profile statistics to `profile_path`, if they are set."""
+        if not self.enabled:
+            return
+        if self.trace_path is not None:
+            self.trace_path.write_text(json.dumps(self.chromeTrace()), encoding='utf-8')
+        if self.profile_path is not None and self.stats is not None:
+            self.stats.dump_stats(self.profile_path)
+
+__all__ = [
+    "Span",
+    "CounterSample",
+    "TraceEvent",
+    "peakRss",
+    "Tracer"
+]
@@ -1,40 +1,83 @@
-from manim import config
-from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, TransferSpeedColumn
+from manim import config, tempconfig, register_font
 from copy import copy
-from contextlib import contextmanager
-from io import StringIO
-from typing import get_args, get_origin, Literal, Generator, Any, Callable, ParamSpec, TypeVar, Union
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from typing import get_args, get_origin, Literal, Generator, Any, Callable, ParamSpec, Sequence, TypeVar, Union
 from types import UnionType
-from moviepy import VideoFileClip
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from PIL import Image, ImageFilter, ImageEnhance
 from proglog import ProgressBarLogger
 from collections import OrderedDict
 from os import PathLike
 import numpy as np
-import time, sys, inspect, re
+import time, sys, os, inspect, re, subprocess, logging
 
 from .config import *
-from .typing import StrPath
+from .typing import StrPath, BinaryOutput
+from .glow import GlowCache
+from .encoder import EncoderConfig, FFmpegEncoder
+from .progress import DefaultProgressBar, ProgressSink, defaultProgress
+
+class _LogBuffer(logging.Handler):
+    """A logging handler that keeps the records instead of emitting them."""
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
 
 @contextmanager
 def noManimOutput() -> Generator[None, Any, None]:
     """
     Context manager used to execute code without outputting Manim logs.
+
+    Manim's log records are held back and its progress bars are disabled; the warnings and errors are printed to
+    stderr when the context exits. The standard streams of the process are not replaced.
     """
-    sys.stdout = StringIO()
-    stderr_buffer = StringIO()
-    sys.stderr = stderr_buffer
-    config.progress_bar = "none"
+    manim_logger = logging.getLogger('manim')
+    handlers, propagate = manim_logger.handlers[:], manim_logger.propagate
+    buffer = _LogBuffer(logging.WARNING)
+    manim_logger.handlers = [buffer]
+    manim_logger.propagate = False
 
     try:
-        yield
+        with tempconfig({'progress_bar': 'none'}):
+            yield
     finally:
-        sys.stdout = ORIGINAL_STDOUT
-        sys.stderr = ORIGINAL_STDERR
-        config.progress_bar = ORIGINAL_PROGRESS_BAR
-        stderr_content = stderr_buffer.getvalue()
-        if stderr_content:
-            print(stderr_content, file=ORIGINAL_STDERR)
+        manim_logger.handlers = handlers
+        manim_logger.propagate = propagate
+        for record in buffer.records:
+            print(f"{record.levelname}: {record.getMessage()}", file=sys.stderr)
+
+_CODE_FONT_PATH = os.path.join(os.path.dirname(__file__), 'fonts/CodeVideoRendererFont.ttf')
+_code_font: ExitStack | None = None
+
+@contextmanager
+def codeFont() -> Generator[None, Any, None]:
+    """
+    Context manager used to register the code font, unless `keepCodeFont` has registered it for the whole process.
+    """
+    if _code_font is not None:
+        yield
+        return
+    with register_font(_CODE_FONT_PATH):
+        yield
+
+def keepCodeFont() -> None:
+    """
+    Register the code font for the rest of the process, so that renders do not register it again.
+    """
+    global _code_font
+    if _code_font is None:
+        stack = ExitStack()
+        stack.enter_context(register_font(_CODE_FONT_PATH))
+        _code_font = stack
 
 def stripEmptyLines(text: str) -> str:
     """
@@ -350,11 +393,127 @@ def checkType(value: Any, expected_type: Any | type[Any], param_name: str, path:
         
         raise TypeError(f"Parameter '{param_name}'{path}: Expected '{typeName(expected_type)}', got '{type(value).__name__}'")
 
+Validator = Callable[[Any], bool]
+_VALIDATOR_CACHE: dict[Any, Validator] = {}
+
+def _isPathLike(expected_type: Any) -> bool:
+    return expected_type is PathLike or (hasattr(expected_type, '__name__') and expected_type.__name__ == 'PathLike')
+
+def compileValidator(expected_type: Any | type[Any]) -> Validator:
+    """
+    Compile a type annotation into a predicate that accepts exactly the values `checkType` accepts.
+
+    The predicate does not build any error message. When it returns `False`, run `checkType` on the
+    same value to get the exception describing the mismatch. Compiled predicates are cached by annotation.
+
+    Args:
+        expected_type (Any | type[Any]): The expected type.
+
+    Returns:
+        Validator: A function returning whether a value matches `expected_type`.
+    """
+    try:
+        return _VALIDATOR_CACHE[expected_type]
+    except KeyError:
+        pass
+    except TypeError:
+        # 不可哈希的注解不缓存
+        return _compileValidator(expected_type)
+    validator = _VALIDATOR_CACHE[expected_type] = _compileValidator(expected_type)
+    return validator
+
+def _compileValidator(expected_type: Any) -> Validator:
+    # 分支顺序与 checkType 保持一致
+    if expected_type is None:
+        return lambda value: value is None
+
+    if _isPathLike(expected_type):
+        return lambda value: isinstance(value, (str, PathLike))
+
+    origin = get_origin(expected_type)
+    args = get_args(expected_type)
+
+    if origin is Literal:
+        literal_set = frozenset(args)
+        def validateLiteral(value: Any) -> bool:
+            try:
+                return value in literal_set
+            except TypeError:
+                # 不可哈希的值只能逐个比较
+                return value in args
+        return validateLiteral
+
+    if origin is Union or isinstance(expected_type, UnionType):
+        union_validators = tuple(compileValidator(arg) for arg in args)
+        return lambda value: any(validate(value) for validate in union_validators)
+
+    if origin is tuple:
+        item_validators = tuple(compileValidator(arg) for arg in args)
+        length = len(item_validators)
+        return lambda value: (
+            isinstance(value, tuple) and len(value) == length
+            and all(validate(item) for validate, item in zip(item_validators, value))
+        )
+
+    if origin is list:
+        validate_item = compileValidator(args[0] if args else Any)
+        return lambda value: isinstance(value, list) and all(validate_item(item) for item in value)
+
+    if origin is dict:
+        validate_key = compileValidator(args[0] if len(args) > 0 else Any)
+        validate_value = compileValidator(args[1] if len(args) > 1 else Any)
+        return lambda value: isinstance(value, dict) and all(validate_key(key) and validate_value(val) for key, val in value.items())
+
+    if origin is set:
+        validate_item = compileValidator(args[0] if args else Any)
+        return lambda value: isinstance(value, set) and all(validate_item(item) for item in value)
+
+    if origin:
+        try:
+            isinstance(None, origin)
+        except TypeError:
+            return lambda value: False
+        return lambda value: isinstance(value, origin)
+
+    try:
+        isinstance(None, expected_type)
+    except TypeError:
+        return lambda value: False
+    return lambda value: isinstance(value, expected_type)
+
+_TYPE_CHECKING = True
+_type_checking: ContextVar[bool | None] = ContextVar('type_checking', default=None)
+
+def setTypeChecking(enabled: bool) -> None:
+    """
+    Globally enable or disable the argument checks of functions decorated with `typeChecker`.
+
+    Args:
+        enabled (bool): Whether arguments are checked.
+    """
+    global _TYPE_CHECKING
+    _TYPE_CHECKING = enabled
+
+@contextmanager
+def noTypeChecking() -> Generator[None, Any, None]:
+    """
+    Context manager used to skip the argument checks of functions decorated with `typeChecker`,
+    for callers whose arguments are already known to be valid. Only affects the current thread or task.
+    """
+    token = _type_checking.set(False)
+    try:
+        yield
+    finally:
+        _type_checking.reset(token)
+
 P = ParamSpec('P')
 R = TypeVar('R')
 def typeChecker(func: Callable[P, R]) -> Callable[P, R]:
     """
-    Decorator to check types of function arguments and return value.
+    Decorator to check types of function arguments.
+
+    The annotations are compiled into validators once, when the function is decorated. Checks can be
+    skipped with `setTypeChecking` or `noTypeChecking`.
 
     Args:
         func (Callable): The function to decorate.
@@ -362,59 +521,193 @@ def typeChecker(func: Callable[P, R]) -> Callable[P, R]:
     Returns:
         Callable: The wrapped function with type checking.
     """
+    sig = inspect.signature(func)
+    annotations: dict[str, Any] = {
+        name: param.annotation
+        for name, param in sig.parameters.items()
+        if param.annotation is not inspect.Parameter.empty
+    }
+    validators = {name: compileValidator(annotation) for name, annotation in annotations.items()}
+    # 只有普通参数时可以直接按位置对应参数名，否则交给 sig.bind 处理
+    positional_names = tuple(sig.parameters)
+    simple = all(
+        param.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        for param in sig.parameters.values()
+    )
+
+    def check(name: str, value: Any) -> None:
+        validate = validators.get(name)
+        if validate is not None and not validate(value):
+            # 仅在失败时生成详细的错误信息
+            checkType(value, annotations[name], name)
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        sig = inspect.signature(func)
-        bound_args = sig.bind(*args, **kwargs)
-        
-        for param_name, param_value in bound_args.arguments.items():
-            param_type = sig.parameters[param_name].annotation
-            if param_type is inspect.Parameter.empty:
-                continue  # 无注解则跳过
-            
-            # Use recursive type checking
-            checkType(param_value, param_type, param_name)
-                        
+        enabled = _type_checking.get()
+        if not (_TYPE_CHECKING if enabled is None else enabled):
+            return func(*args, **kwargs)
+
+        if simple and len(args) <= len(positional_names) and not kwargs.keys() & positional_names[:len(args)]:
+            for name, value in zip(positional_names, args):
+                check(name, value)
+            for name, value in kwargs.items():
+                check(name, value)
+        else:
+            for name, value in sig.bind(*args, **kwargs).arguments.items():
+                check(name, value)
+
         return func(*args, **kwargs)
     return wrapper
 
-def addGlowEffect(input_path: StrPath, output_path: StrPath, output: bool) -> None:
+def frameGlow(frame: np.ndarray) -> np.ndarray:
     """
-    Add a glow effect to a video.
+    Add a glow effect to a single frame.
+
+    Args:
+        frame (np.ndarray): An RGB or RGBA frame.
+
+    Returns:
+        np.ndarray: The glowed frame, with the same channels as `frame`.
+    """
+    # 转为PIL图像
+    frame = frame.astype(np.uint8)
+    pil_img = Image.fromarray(frame).convert("RGBA")
+
+    # 提升基础亮度
+    brightness_enhancer = ImageEnhance.Brightness(pil_img)
+    pil_img = brightness_enhancer.enhance(1.2)
+
+    # 创建模糊光晕层
+    glow = pil_img.filter(ImageFilter.GaussianBlur(radius=10))
+
+    # 提升光晕的亮度和饱和度
+    glow_bright_enhancer = ImageEnhance.Brightness(glow)
+    glow = glow_bright_enhancer.enhance(1.5)
+    glow_color_enhancer = ImageEnhance.Color(glow)
+    glow = glow_color_enhancer.enhance(1.2)
+
+    # 混合原图像与光晕层，保持输入的通道数
+    soft_glow_img = Image.blend(glow, pil_img, 0.4)
+    return np.array(soft_glow_img.convert("RGBA" if frame.shape[-1] == 4 else "RGB"))
+
+def countFrames(path: StrPath) -> int:
+    """
+    Count the frames of the first video stream of a file without decoding it.
+
+    Args:
+        path (StrPath): Path to the video file.
+
+    Returns:
+        int: The number of frames.
+    """
+    # framecrc 为每个数据包输出一行，视频流复制时每个数据包就是一帧
+    result = subprocess.run(
+        [FFMPEG_BINARY, '-loglevel', 'error', '-i', str(path), '-map', '0:v:0', '-c', 'copy', '-f', 'framecrc', '-'],
+        capture_output=True, text=True, check=True
+    )
+    return sum(1 for line in result.stdout.splitlines() if line and not line.startswith('#'))
+
+def _glowChunk(input_path: str, chunk_path: str | BinaryOutput, start: int, end: int, encoder: EncoderConfig | None = None, audio_path: str | None = None, advance: Callable[[], None] | None = None) -> tuple[int, int]:
+    # 处理 [start, end) 范围内的帧并单独编码（通常在子进程中），返回帧数与复用的帧数
+    reader = FFMPEG_VideoReader(input_path)
+    glow = GlowCache(frameGlow)
+    width, height = reader.size
+    try:
+        with FFmpegEncoder(chunk_path, (width, height), reader.fps, encoder, audio_path=audio_path) as writer:
+            for index in range(start, end):
+                writer.write(glow(reader.get_frame(index / reader.fps)))
+                if advance is not None:
+                    advance()
+    finally:
+        reader.close()
+    return end - start, glow.hits
+
+def addGlowEffect(input_path: StrPath, output_path: StrPath | BinaryOutput, output: bool, workers: int = 1, encoder: EncoderConfig | None = None, progress: ProgressSink | None = None) -> int:
+    """
+    Add a glow effect to a video. This decodes and encodes the whole video again, see `frameGlow` for glowing frames before they are encoded.
+
+    With more than one worker, the video is split into consecutive frame ranges that are glowed and encoded in
+    separate processes, then concatenated without re-encoding. The frame order and count are preserved.
 
     Args:
         input_path (StrPath): Path to the input video file.
-        output_path (StrPath): Path to save the output video file.
+        output_path (StrPath | BinaryOutput): Path to save the output video file, or a binary stream the video is written to as a fragmented MP4.
         output (bool): Whether to display progress bars.
-        
+        workers (int): The number of processes. Defaults to 1, which processes the video in the current process.
+        encoder (EncoderConfig | None): The encoder settings. The audio of the input is kept if `encoder.audio` is set. Defaults to `None`, which uses `EncoderConfig()`.
+        progress (ProgressSink | None): Where the progress is reported. Defaults to `None`, which uses `defaultProgress(output)`.
+
     Returns:
-        None
-    """
-    # 内部帧处理函数
-    def _frame_glow(t: np.ndarray):
-        # 获取MoviePy的numpy帧并转为PIL图像
-        frame = t.astype(np.uint8)
-        pil_img = Image.fromarray(frame).convert("RGBA")
-
-        # 提升基础亮度
-        brightness_enhancer = ImageEnhance.Brightness(pil_img)
-        pil_img = brightness_enhancer.enhance(1.2)
-
-        # 创建模糊光晕层
-        glow = pil_img.filter(ImageFilter.GaussianBlur(radius=10))
-
-        # 提升光晕的亮度和饱和度
-        glow_bright_enhancer = ImageEnhance.Brightness(glow)
-        glow = glow_bright_enhancer.enhance(1.5)
-        glow_color_enhancer = ImageEnhance.Color(glow)
-        glow = glow_color_enhancer.enhance(1.2)
-
-        # 混合原图像与光晕层
-        soft_glow_img = Image.blend(glow, pil_img, 0.4)
-        glow_frame = np.array(soft_glow_img.convert("RGB")).astype(np.uint8)
-        return np.clip(glow_frame, 0, 255)
-    
-    glow_video: VideoFileClip = VideoFileClip(input_path).image_transform(_frame_glow)
-    glow_video.write_videofile(output_path, codec='libx264', audio=True, logger=RichProgressBarLogger(output=output, title="Glow Effect", leave_bars=False))
+        int: The number of frames identical to a recent frame, whose glow was reused instead of recomputed.
+    """
+    if workers < 1:
+        raise ValueError("workers must be greater than or equal to 1")
+    encoder = encoder or EncoderConfig()
+    progress = progress if progress is not None else defaultProgress(output)
+    total_frames = countFrames(input_path)
+    if workers == 1:
+        # 输出到流时直接编码为分片MP4
+        with progress.task("Glow Effect", total_frames, 'frames') as task:
+            _, reused_frames = _glowChunk(str(input_path), output_path if isinstance(output_path, BinaryOutput) else str(output_path), 0, total_frames, encoder, audio_path=str(input_path), advance=task.advance)
+        return reused_frames
+
+    # 每个进程分到多个区间，兼顾负载均衡与进度条的更新频率
+    chunk_count = max(min(workers * 4, total_frames), 1)
+    bounds = [round(total_frames * i / chunk_count) for i in range(chunk_count + 1)]
+
+    with TemporaryDirectory(dir=Path(input_path).parent) as chunk_dir:
+        chunk_paths = [os.path.join(chunk_dir, f"chunk_{i:05d}.mp4") for i in range(chunk_count)]
+        with ProcessPoolExecutor(max_workers=workers) as executor, progress.task("Glow Effect", total_frames, 'frames') as task:
+            futures = [
+                executor.submit(_glowChunk, str(input_path), chunk_path, start, end, encoder)
+                for chunk_path, start, end in zip(chunk_paths, bounds[:-1], bounds[1:])
+            ]
+            reused_frames = 0
+            for future in as_completed(futures):
+                frame_count, hits = future.result()
+                reused_frames += hits
+                task.advance(frame_count)
+
+        # 无损拼接各区间，需要时保留原视频的音频（如果有）
+        concatVideos(chunk_paths, output_path, audio_path=input_path if encoder.audio else None)
+    return reused_frames
+
+def concatVideos(paths: Sequence[StrPath], output_path: StrPath | BinaryOutput, audio_path: StrPath | None = None) -> None:
+    """
+    Concatenate videos with identical encoding parameters without re-encoding them.
+
+    A binary stream receives a fragmented MP4, which is written while ffmpeg produces it and can be played
+    before it is complete, so the stream does not need to be seekable.
+
+    Args:
+        paths (Sequence[StrPath]): The videos, in order.
+        output_path (StrPath | BinaryOutput): Path to save the output video file, or a binary stream to write the video to.
+        audio_path (StrPath | None): A video whose audio stream (if any) is copied to the output. Defaults to None.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails.
+    """
+    with TemporaryDirectory(dir=Path(paths[0]).parent) as list_dir:
+        list_path = os.path.join(list_dir, 'videos.txt')
+        with open(list_path, 'w', encoding='utf-8') as file:
+            # concat 列表中的单引号需要转义
+            file.writelines("file '{}'\n".format(str(Path(path).resolve()).replace("'", "'\\''")) for path in paths)
+        command = [FFMPEG_BINARY, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_path is not None:
+            command += ['-i', str(audio_path), '-map', '0:v', '-map', '1:a?']
+        command.extend(['-c', 'copy'])
+        if not isinstance(output_path, BinaryOutput):
+            subprocess.run([*command, str(output_path)], check=True)
+            return
+
+        # 分片MP4不需要在写完后回填文件头，可以边生成边写入不可定位的流
+        command.extend(['-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', 'pipe:1'])
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+            assert process.stdout is not None
+            while chunk := process.stdout.read(1 << 16):
+                output_path.write(chunk)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
 
 def findSpacePositions(string: str) -> list[list[int]]:
     """
@@ -515,21 +808,6 @@ def replaceMiddleSpacesWithOccupyCharacter(string: str) -> str:
     
     return '\n'.join(result)
 
-class DefaultProgressBar(Progress):
-    """
-    Default progress bar.
-    """
-    def __init__(self, output: bool):
-        super().__init__(
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[yellow]{task.completed}/{task.total}"),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            TimeRemainingColumn(),
-            TransferSpeedColumn(),
-            console=DEFAULT_OUTPUT_CONSOLE if output else None
-        )
-
 class RichProgressBarLogger(ProgressBarLogger):
     """
     A progress logger that uses Rich to display progress bars.
@@ -611,6 +889,9 @@ class RichProgressBarLogger(ProgressBarLogger):
             self.new_tqdm_bar(bar)
         
         task_id = self.rich_bars.get(bar)
+        # 不输出时没有对应的进度条任务
+        if task_id is None:
+            return
         if attr == "index":
             # 处理帧数更新（核心）
             if value >= old_value:
@@ -643,11 +924,19 @@ class RichProgressBarLogger(ProgressBarLogger):
 
 __all__ = [
     "noManimOutput",
+    "codeFont",
+    "keepCodeFont",
     "stripEmptyLines",
     "typeName",
     "checkType",
+    "compileValidator",
+    "setTypeChecking",
+    "noTypeChecking",
     "typeChecker",
+    "frameGlow",
+    "countFrames",
     "addGlowEffect",
+    "concatVideos",
     "findSpacePositions",
     "findEmptyLinePositions",
     "replaceMiddleSpacesWithOccupyCharacter",
@@ -0,0 +1,53 @@
+"""
+Cost of reading an attribute of `CameraFollowCursorCV`, compared with a plain object and with the
+`inspect.stack()` guard of `__getattribute__` that was used before.
+
+Usage:
+    python benchmarks/attribute_access.py
+"""
+from timeit import repeat
+import argparse, inspect
+
+from CodeVideoRenderer import CameraFollowCursorCV
+
+class Plain:
+    pass
+
+class LegacyGuarded:
+    """The guard used before: walk the whole stack looking for a frame whose `self` is an instance."""
+    __all__ = ["render"]
+
+    def __getattribute__(self, name):
+        is_internal_call = False
+        for frame in inspect.stack()[1:]:
+            if isinstance(frame.frame.f_locals.get('self'), LegacyGuarded):
+                is_internal_call = True
+                break
+        if not is_internal_call and name not in super().__getattribute__("__all__"):
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+def readLoop(self, count: int) -> None:
+    # 参数名为 self，旧的守卫会把这里的读取视为内部访问
+    for _ in range(count):
+        self._output
+
+def measure(instance: object, count: int) -> float:
+    object.__setattr__(instance, '_output', False)
+    return min(repeat(lambda: readLoop(instance, count), number=1, repeat=5)) / count * 1e9
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200_000)
+    args = parser.parse_args()
+
+    plain = measure(Plain(), args.count)
+    current = measure(object.__new__(CameraFollowCursorCV), args.count)
+    legacy = measure(object.__new__(LegacyGuarded), max(args.count // 1000, 10))
+
+    print(f"{'object':<22} {'ns/read':>10} {'vs plain':>10}")
+    for name, cost in (('plain object', plain), ('CameraFollowCursorCV', current), ('inspect.stack() guard', legacy)):
+        print(f"{name:<22} {cost:>10.1f} {cost / plain:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
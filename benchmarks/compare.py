@@ -0,0 +1,65 @@
+"""
+Compare two result files of `stages.py`, such as the results of two commits.
+
+Every stage of every case present in both files is listed with its time and peak memory before and after. A
+stage regresses when it became slower by more than `--threshold` (relative) and `--min-seconds` (absolute), or
+its peak memory grew by more than `--threshold` and `--min-mib`. The script exits with status 1 if any stage
+regressed.
+
+Usage:
+    python benchmarks/compare.py before.json after.json --threshold 0.1
+"""
+from pathlib import Path
+from typing import Any
+import argparse, json, sys
+
+def load(path: str) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+def change(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.1%}" if before else "-"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative increase that counts as a regression")
+    parser.add_argument('--min-seconds', type=float, default=0.05, help="smallest absolute slowdown that counts as a regression")
+    parser.add_argument('--min-mib', type=float, default=1.0, help="smallest absolute memory growth that counts as a regression")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    if before['settings'] != after['settings']:
+        print(f"The settings differ: {before['settings']} and {after['settings']}.", file=sys.stderr)
+
+    regressions: list[str] = []
+    def regressed(old: float | None, new: float | None, minimum: float) -> bool:
+        return old is not None and new is not None and new - old > max(old * args.threshold, minimum)
+
+    print(f"{'case':>20} {'stage':>13} {'before s':>9} {'after s':>9} {'change':>8} {'before MiB':>11} {'after MiB':>10} {'change':>8}")
+    for name in [name for name in before['results'] if name in after['results']]:
+        old_case, new_case = before['results'][name], after['results'][name]
+        rows = [(stage, old_case['stages'][stage], new_case['stages'].get(stage)) for stage in old_case['stages']]
+        rows.append(('total', {'seconds': old_case['total_seconds'], 'peak_mib': None}, {'seconds': new_case['total_seconds'], 'peak_mib': None}))
+        for stage, old, new in rows:
+            if new is None:
+                continue
+            slower = regressed(old['seconds'], new['seconds'], args.min_seconds)
+            larger = regressed(old['peak_mib'], new['peak_mib'], args.min_mib)
+            if slower:
+                regressions.append(f"{name} {stage} time")
+            if larger:
+                regressions.append(f"{name} {stage} memory")
+            memory = (
+                f"{old['peak_mib']:>11.1f} {new['peak_mib']:>10.1f} {change(old['peak_mib'], new['peak_mib']):>8}"
+                if old['peak_mib'] is not None and new['peak_mib'] is not None else f"{'-':>11} {'-':>10} {'-':>8}"
+            )
+            marker = " <" if slower or larger else ""
+            print(f"{name:>20} {stage:>13} {old['seconds']:>9.3f} {new['seconds']:>9.3f} {change(old['seconds'], new['seconds']):>8} {memory}{marker}")
+
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}.", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
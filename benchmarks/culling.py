@@ -0,0 +1,72 @@
+"""
+Per-frame cost of `CameraFollowCursorCV` with and without viewport culling.
+
+Only the frames of the last few lines are rendered (everything before is skipped through manim's
+`from_animation_number`), so the numbers show how the cost of a single frame grows with the amount
+of code that has already been typed. The frames are taken from `CameraFollowCursorCV.frames` without
+the glow effect, one at a time, and the time between two distinct frames is reported.
+
+With culling, the per-frame cost of the largest input divided by that of the smallest must stay below
+`--tolerance`; otherwise the script exits with an error.
+
+Usage:
+    python benchmarks/culling.py --lines 50 5000 --tolerance 1.5
+"""
+from manim import tempconfig
+from statistics import median
+from time import perf_counter
+import argparse
+
+from CodeVideoRenderer import CameraFollowCursorCV, RenderOptions
+
+def syntheticCode(lines: int) -> str:
+    return "\n".join(f"value_{i} = compute(value_{i - 1}, {i}) + offset" for i in range(lines))
+
+def measure(lines: int, tail: int, viewport_culling: bool) -> float:
+    code_video = CameraFollowCursorCV(code=('string', syntheticCode(lines)), language='python')
+    # 入场动画、第一行之后每行的换行动画与每次按键各播放一次
+    skipped_lines = max(lines - tail, 0)
+    skipped_plays = 1 + max(skipped_lines - 1, 0) + int(code_video.plan.line_offsets[skipped_lines])
+
+    with tempconfig({
+        'pixel_width': 854,
+        'pixel_height': 480,
+        'frame_rate': 15,
+        'from_animation_number': skipped_plays,
+    }):
+        frame_times: list[float] = []
+        previous, start = None, perf_counter()
+        # 缓冲区只有一帧，两帧之间的时间就是渲染一帧的时间
+        for frame in code_video.frames(RenderOptions(engine='manim', viewport_culling=viewport_culling), glow=False, buffer_size=1):
+            now = perf_counter()
+            # 重复的帧是同一个数组，不计入
+            if frame is not previous:
+                if previous is not None:
+                    frame_times.append(now - start)
+                previous, start = frame, now
+    return median(frame_times) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[50, 5000])
+    parser.add_argument('--tail', type=int, default=5, help="number of trailing lines whose frames are rendered")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="maximum per-frame cost of the largest input relative to the smallest, with culling")
+    args = parser.parse_args()
+
+    culled: dict[int, float] = {}
+    print(f"{'lines':>8} {'culling':>8} {'ms/frame':>10}")
+    for lines in args.lines:
+        for viewport_culling in (False, True):
+            frame_ms = measure(lines, args.tail, viewport_culling)
+            if viewport_culling:
+                culled[lines] = frame_ms
+            print(f"{lines:>8} {str(viewport_culling):>8} {frame_ms:>10.2f}")
+
+    smallest, largest = min(culled), max(culled)
+    ratio = culled[largest] / culled[smallest]
+    print(f"Per-frame cost with culling, {largest} lines / {smallest} lines: {ratio:.2f}x (tolerance {args.tolerance:.2f}x)")
+    if ratio > args.tolerance:
+        raise SystemExit(f"Per-frame cost grows with the code length: {ratio:.2f}x exceeds {args.tolerance:.2f}x")
+
+if __name__ == '__main__':
+    main()
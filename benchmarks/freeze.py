@@ -0,0 +1,60 @@
+"""
+Cost of `CameraFollowCursorCV` with and without frozen code lines (`RenderOptions.freeze_lines`).
+
+Every frame of a synthetic file is taken from `CameraFollowCursorCV.frames` without the glow effect, one at a
+time. Reported per mode:
+
+- `ms/frame`: the median time between two distinct frames.
+- `total s`: the time of the whole render, including rasterizing the frozen blocks.
+- `layers MiB`: the memory of the frozen layers left in `FROZEN_LAYER_CACHE`.
+
+Viewport culling is turned off with `--no-culling`, which shows the gain on long files where every completed
+line stays in the scene.
+
+Usage:
+    python benchmarks/freeze.py --lines 50 200
+"""
+from manim import tempconfig
+from statistics import median
+from time import perf_counter
+import argparse
+
+from CodeVideoRenderer import CameraFollowCursorCV, RenderOptions, FROZEN_LAYER_CACHE
+
+def syntheticCode(lines: int) -> str:
+    return "\n".join(f"value_{i} = compute(value_{i - 1}, {i}) + offset" for i in range(lines))
+
+def measure(lines: int, freeze_lines: bool, viewport_culling: bool) -> tuple[float, float, float]:
+    FROZEN_LAYER_CACHE.clear()
+    with tempconfig({'pixel_width': 854, 'pixel_height': 480, 'frame_rate': 15}):
+        code_video = CameraFollowCursorCV(code=('string', syntheticCode(lines)), language='python')
+        options = RenderOptions(engine='manim', viewport_culling=viewport_culling, freeze_lines=freeze_lines)
+        frame_times: list[float] = []
+        previous, begin = None, perf_counter()
+        start = begin
+        # 缓冲区只有一帧，两帧之间的时间就是渲染一帧的时间
+        for frame in code_video.frames(options, glow=False, buffer_size=1):
+            now = perf_counter()
+            # 重复的帧是同一个数组，不计入
+            if frame is not previous:
+                if previous is not None:
+                    frame_times.append(now - start)
+                previous, start = frame, now
+        total = perf_counter() - begin
+    layers = sum(entry[0].nbytes for entry in FROZEN_LAYER_CACHE.values())
+    return median(frame_times) * 1000, total, layers / 1024 ** 2
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--no-culling', dest='viewport_culling', action='store_false', help="keep every line in the scene")
+    args = parser.parse_args()
+
+    print(f"{'lines':>8} {'freeze':>8} {'ms/frame':>10} {'total s':>9} {'layers MiB':>11}")
+    for lines in args.lines:
+        for freeze_lines in (False, True):
+            frame_ms, total, layers = measure(lines, freeze_lines, args.viewport_culling)
+            print(f"{lines:>8} {str(freeze_lines):>8} {frame_ms:>10.2f} {total:>9.2f} {layers:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-frame cost of the NumPy `GlowKernel` compared with the PIL based `frameGlow`, and the largest per-pixel
+difference between their outputs.
+
+The frames are synthetic: colored words on a dark background, which is what the glow is applied to in practice,
+with words cut off at the right border. The error is reported for the whole frame and separately for the interior
+(more than two blur radii from the border). The script exits with status 1 if the error anywhere in the frame
+exceeds `--max-error`, or if the alpha channel is not passed through.
+
+Usage:
+    python benchmarks/glow.py --sizes 1280x720 1920x1080 --downsample 1 2 4
+"""
+from PIL import Image, ImageDraw, ImageFont
+from statistics import median
+from time import perf_counter
+from typing import Callable
+import argparse, sys
+import numpy as np
+
+from CodeVideoRenderer import GlowKernel, frameGlow
+
+def syntheticFrame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGBA', (width, height), (24, 24, 27, 255))
+    draw = ImageDraw.Draw(image)
+    size = max(height // 40, 8)
+    font = ImageFont.load_default(size=size)
+    for y in range(size, height - size, int(size * 1.3)):
+        x = int(rng.integers(size, width // 8))
+        while x < width:
+            word = f"value_{rng.integers(1000)}"
+            draw.text((x, y), word, fill=tuple(int(v) for v in rng.integers(80, 256, 3)) + (255,), font=font)
+            x += int((len(word) + 1) * size * 0.6)
+    return np.array(image)
+
+def measure(function: Callable[[np.ndarray], np.ndarray], frame: np.ndarray, repeat: int) -> float:
+    function(frame)
+    times: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function(frame)
+        times.append(perf_counter() - start)
+    return median(times) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['1280x720', '1920x1080'])
+    parser.add_argument('--downsample', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-error', type=int, default=8, help="largest accepted per-channel difference from frameGlow")
+    args = parser.parse_args()
+
+    failed = False
+    border = 2 * 10  # 两倍模糊半径
+    print(f"{'size':>10} {'glow':>12} {'ms/frame':>10} {'speedup':>8} {'interior':>8} {'max err':>8} {'mean err':>9}")
+    for size in args.sizes:
+        width, height = map(int, size.split('x'))
+        frame = syntheticFrame(width, height)
+        reference = frameGlow(frame).astype(np.int16)
+        baseline = measure(frameGlow, frame, args.repeat)
+        print(f"{size:>10} {'PIL':>12} {baseline:>10.1f} {1:>7.1f}x {'-':>8} {'-':>8} {'-':>9}")
+        for downsample in args.downsample:
+            kernel = GlowKernel(downsample=downsample)
+            result = kernel(frame)
+            error = np.abs(result.astype(np.int16) - reference)
+            cost = measure(kernel, frame, args.repeat)
+            interior = int(error[border:-border, border:-border].max())
+            failed |= int(error.max()) > args.max_error or not np.array_equal(result[..., 3], frame[..., 3])
+            print(f"{size:>10} {f'NumPy /{downsample}':>12} {cost:>10.1f} {baseline / cost:>7.1f}x {interior:>8} {error.max():>8} {error.mean():>9.3f}")
+
+    if failed:
+        print(f"The NumPy glow differs from frameGlow by more than {args.max_error}.", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
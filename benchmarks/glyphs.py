@@ -0,0 +1,120 @@
+"""
+Memory of a code layout with and without shared glyph outlines (`shareGlyphs`).
+
+Every mode runs in a fresh process, which builds manim's `Code` for a synthetic file, optionally shares its
+glyphs, takes one copy of the layout, as every render does when it reuses a cached layout, and then reads the
+points of the glyphs of the last `--visible` lines of the copy `--passes` times, as the renderer does for every
+frame that shows them. Reported per mode:
+
+- `build_seconds`: building the layout, including `shareGlyphs`.
+- `layout_mib`: the Python and NumPy memory held by the built layout, measured with `tracemalloc`.
+- `copy_mib`: the memory of one copy of the layout.
+- `draw_seconds`: reading the points of the visible glyphs in every pass.
+- `draw_mib`: the memory the reads keep allocated after the last pass.
+- `draw_peak_mib`: the peak memory allocated while reading.
+- `rss_mib`: the resident set size of the process once the layout, its copy and the reads are done (Linux only).
+- `peak_rss_mib`: the peak resident set size of the process.
+
+Usage:
+    python benchmarks/glyphs.py --lines 1000 10000 --visible 40 --passes 30 --output glyphs.json
+"""
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+import argparse, gc, json, os, subprocess, sys, tracemalloc
+
+def syntheticCode(lines: int) -> str:
+    return "\n".join(f"    value_{i} = compute(value_{i - 1}, {i}) + offset  # step {i % 7}" for i in range(lines))
+
+def residentMiB() -> float | None:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peakResidentMiB() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+def measure(lines: int, shared: bool, visible: int, passes: int) -> dict[str, Any]:
+    """Build, copy and draw one layout in this process."""
+    from manim import Code
+    from CodeVideoRenderer import codeFont, shareGlyphs
+
+    code = syntheticCode(lines)
+    tracemalloc.start()
+    start = perf_counter()
+    with codeFont():
+        layout = Code(code_string=code, language='python', paragraph_config={'font': 'CodeVideoRendererFont'}).submobjects[1:3]
+    glyphs = shapes = 0
+    if shared:
+        for mobject in layout:
+            counts = shareGlyphs(mobject)
+            glyphs, shapes = glyphs + counts[0], shapes + counts[1]
+    build_seconds = perf_counter() - start
+    gc.collect()
+    layout_bytes = tracemalloc.get_traced_memory()[0]
+    copies = [mobject.copy() for mobject in layout]
+    gc.collect()
+    copy_bytes = tracemalloc.get_traced_memory()[0] - layout_bytes
+    # 每一帧都会读取可见字形的点
+    visible_glyphs = [glyph for mobject in copies for line in mobject.submobjects[-visible:] for glyph in line.get_family()]
+    tracemalloc.reset_peak()
+    start = perf_counter()
+    for _ in range(passes):
+        for glyph in visible_glyphs:
+            glyph.points
+    draw_seconds = perf_counter() - start
+    draw_bytes, draw_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'build_seconds': build_seconds,
+        'glyphs': glyphs,
+        'shapes': shapes,
+        'layout_mib': layout_bytes / 1024 ** 2,
+        'copy_mib': copy_bytes / 1024 ** 2,
+        'draw_seconds': draw_seconds,
+        'draw_mib': (draw_bytes - layout_bytes - copy_bytes) / 1024 ** 2,
+        'draw_peak_mib': (draw_peak - layout_bytes - copy_bytes) / 1024 ** 2,
+        'rss_mib': residentMiB(),
+        'peak_rss_mib': peakResidentMiB()
+    }
+    del copies
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--visible', type=int, default=40, help="number of trailing lines whose glyphs are drawn")
+    parser.add_argument('--passes', type=int, default=30, help="number of times the visible glyphs are drawn")
+    parser.add_argument('--output', default=None, help="the JSON file the results are written to")
+    parser.add_argument('--mode', choices=['plain', 'shared'], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        # 子进程：只测量一种模式，结果写到标准输出
+        print(json.dumps(measure(args.lines[0], args.mode == 'shared', args.visible, args.passes)))
+        return
+
+    results: dict[str, dict[str, Any]] = {}
+    print(f"{'lines':>7} {'mode':>7} {'build s':>8} {'layout MiB':>11} {'copy MiB':>9} {'draw s':>7} {'draw MiB':>9} {'draw peak':>10} {'RSS MiB':>8} {'peak MiB':>9} {'shapes':>7}")
+    for lines in args.lines:
+        for mode in ('plain', 'shared'):
+            process = subprocess.run([sys.executable, __file__, '--mode', mode, '--lines', str(lines), '--visible', str(args.visible), '--passes', str(args.passes)], capture_output=True, text=True, check=True)
+            result = results.setdefault(str(lines), {})[mode] = json.loads(process.stdout.splitlines()[-1])
+            rss = '-' if result['rss_mib'] is None else f"{result['rss_mib']:.1f}"
+            peak = '-' if result['peak_rss_mib'] is None else f"{result['peak_rss_mib']:.1f}"
+            print(f"{lines:>7} {mode:>7} {result['build_seconds']:>8.2f} {result['layout_mib']:>11.1f} {result['copy_mib']:>9.1f} {result['draw_seconds']:>7.3f} {result['draw_mib']:>9.2f} {result['draw_peak_mib']:>10.2f} {rss:>8} {peak:>9} {result['shapes'] or '-':>7}")
+
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"Results written to '{args.output}'.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Time and peak memory of each stage of `CameraFollowCursorCV.render` over a fixed synthetic corpus.
+
+The corpus covers a tiny snippet, 50 and 500 line files and a file of very long lines, in several languages.
+Every case is rendered with the `'manim'` engine and the given glow mode, and the time spent in each stage is
+measured by wrapping the functions that implement it:
+
+- `preprocess`: `CameraFollowCursorCV(...)`, which reads the code and compiles the typing plan.
+- `code_mobject`: building manim's `Code` mobject. The in-memory layout cache is cleared before every render, so
+  this is always measured without a cached layout.
+- `construct`: the construct loop, without the time spent in `code_mobject` and `manim_render`.
+- `manim_render`: drawing the frames (`CairoRenderer.update_frame` and `get_frame`).
+- `encoding`: writing frames to ffmpeg and waiting for it to finish, outside of the glow pass. The frames are
+  encoded in manim's writer thread, so this overlaps with the other stages.
+- `glow`: `addGlowEffect`, only with the `'post'` and `'parallel'` glow modes.
+
+The times are the median over `--repeat` renders. The peak memory is measured in a separate render with
+`tracemalloc`, which slows Python down, and counts the Python and NumPy allocations made while the stage runs
+(in any thread) above what was allocated when it started. Memory allocated by Cairo and by ffmpeg is not
+included; the peak resident set size of the whole process is reported instead.
+
+The results are written as JSON to `--output` and can be compared across commits with `compare.py`.
+
+Usage:
+    python benchmarks/stages.py --output before.json
+    python benchmarks/stages.py --cases tiny-python 50-lines-javascript --repeat 3 --output after.json
+    python benchmarks/compare.py before.json after.json
+"""
+from manim import tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+from contextlib import contextmanager
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Generator
+from pathlib import Path
+import argparse, importlib, json, os, platform, subprocess, sys, tracemalloc
+
+import CodeVideoRenderer
+from CodeVideoRenderer import CameraFollowCursorCV, RenderOptions, EncoderConfig, FFmpegEncoder, CODE_LAYOUT_CACHE, countFrames
+
+STAGES = ('preprocess', 'code_mobject', 'construct', 'manim_render', 'encoding', 'glow')
+
+def pythonCode(lines: int) -> str:
+    return "\n".join(
+        f"def step_{i}(value):\n    return value * {i} + offset" if i % 3 == 0 else f"result_{i} = step_{i - i % 3}(result_{i - 1})"
+        for i in range(lines)
+    )
+
+def javascriptCode(lines: int) -> str:
+    return "\n".join(
+        f"function step{i}(value) {{" if i % 4 == 0 else "}" if i % 4 == 3 else f"    const result{i} = value * {i} + offset;"
+        for i in range(lines)
+    )
+
+def cCode(lines: int) -> str:
+    return "\n".join(f"static int value_{i} = compute(value_{i - 1}, {i}) + OFFSET;" for i in range(lines))
+
+def rustCode(lines: int, width: int) -> str:
+    call = "builder.with_option(Option::Value({}))"
+    return "\n".join(
+        f"let chain_{i} = " + ".".join(call.format(j) for j in range(width // len(call))) + ";"
+        for i in range(lines)
+    )
+
+# 名称：(语言, 代码)
+CORPUS: dict[str, tuple[str, str]] = {
+    'tiny-python': ('python', "def greet(name):\n    return f'Hello, {name}!'\nprint(greet('world'))"),
+    '50-lines-javascript': ('javascript', javascriptCode(50)),
+    '500-lines-c': ('c', cCode(500)),
+    '500-lines-python': ('python', pythonCode(500)),
+    'long-lines-rust': ('rust', rustCode(4, 400)),
+}
+
+class StageRecorder:
+    """Accumulate the time, calls and peak traced memory of possibly nested stages."""
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.seconds: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.calls: dict[str, int] = dict.fromkeys(STAGES, 0)
+        self.peaks: dict[str, int] = dict.fromkeys(STAGES, 0)
+        self.open: list[list[Any]] = []  # [名称, 进入时的内存, 当前峰值]
+
+    def _flush(self) -> None:
+        # 将 tracemalloc 的峰值计入所有未结束的阶段后重置，嵌套的阶段不会互相覆盖峰值
+        if self.trace_memory and self.open:
+            peak = tracemalloc.get_traced_memory()[1]
+            for stage in self.open:
+                stage[2] = max(stage[2], peak)
+            tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        self._flush()
+        entry = [name, tracemalloc.get_traced_memory()[0] if self.trace_memory else 0, 0]
+        self.open.append(entry)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += perf_counter() - start
+            self.calls[name] += 1
+            self._flush()
+            self.open.remove(entry)
+            self.peaks[name] = max(self.peaks[name], entry[2] - entry[1])
+
+    def wrap(self, name: str, function: Callable, skip_inside: str | None = None) -> Callable:
+        def wrapper(*args, **kwargs):
+            # 发光处理中的编码计入发光阶段
+            if skip_inside is not None and any(stage[0] == skip_inside for stage in self.open):
+                return function(*args, **kwargs)
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+@contextmanager
+def instrumented(recorder: StageRecorder) -> Generator[None, None, None]:
+    """Wrap the functions of every stage for the duration of the context."""
+    renderer_module = importlib.import_module('CodeVideoRenderer.renderer')
+    create_scene = CameraFollowCursorCV._create_scene
+
+    def createScene(self):
+        scene = create_scene(self)
+        scene.construct = recorder.wrap('construct', scene.construct)
+        return scene
+
+    patches = [
+        (renderer_module, 'codeLayout', recorder.wrap('code_mobject', renderer_module.codeLayout)),
+        (renderer_module, 'addGlowEffect', recorder.wrap('glow', renderer_module.addGlowEffect)),
+        (CameraFollowCursorCV, '_create_scene', createScene),
+        (CairoRenderer, 'update_frame', recorder.wrap('manim_render', CairoRenderer.update_frame)),
+        (CairoRenderer, 'get_frame', recorder.wrap('manim_render', CairoRenderer.get_frame)),
+        (FFmpegEncoder, 'write', recorder.wrap('encoding', FFmpegEncoder.write, skip_inside='glow')),
+        (FFmpegEncoder, 'close', recorder.wrap('encoding', FFmpegEncoder.close, skip_inside='glow')),
+    ]
+    originals = [(owner, name, owner.__dict__[name]) for owner, name, _ in patches]
+    for owner, name, replacement in patches:
+        setattr(owner, name, replacement)
+    try:
+        yield
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+
+def renderOnce(name: str, args: argparse.Namespace, trace_memory: bool) -> tuple[StageRecorder, float, Path]:
+    language, code = CORPUS[name]
+    recorder = StageRecorder(trace_memory)
+    output_path = Path(args.work_dir) / f"{name}.mp4"
+    CODE_LAYOUT_CACHE.clear()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with instrumented(recorder), tempconfig({'pixel_width': args.width, 'pixel_height': args.height, 'frame_rate': args.frame_rate}):
+            start = perf_counter()
+            with recorder.stage('preprocess'):
+                code_video = CameraFollowCursorCV(code=('string', code), language=language, video_name=name, seed=0) # type: ignore[reportArgumentType]
+            code_video.render(output=False, options=RenderOptions(glow_mode=args.glow_mode, encoder=EncoderConfig(preset=args.preset)), destination=output_path)
+            total = perf_counter() - start
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    # 构建循环的时间不包括其中嵌套的阶段
+    recorder.seconds['construct'] -= recorder.seconds['code_mobject'] + recorder.seconds['manim_render']
+    return recorder, total, output_path
+
+def maxRssMiB() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+def gitCommit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(name: str, args: argparse.Namespace) -> dict[str, Any]:
+    runs = [renderOnce(name, args, trace_memory=False) for _ in range(args.repeat)]
+    memory, _, output_path = renderOnce(name, args, trace_memory=True) if args.memory else (None, 0.0, runs[-1][2])
+    language, code = CORPUS[name]
+    return {
+        'language': language,
+        'lines': len(code.splitlines()),
+        'characters': len(code),
+        'frames': countFrames(output_path),
+        'total_seconds': median(total for _, total, _ in runs),
+        'stages': {
+            stage: {
+                'seconds': median(recorder.seconds[stage] for recorder, _, _ in runs),
+                'calls': runs[0][0].calls[stage],
+                'peak_mib': memory.peaks[stage] / 1024 ** 2 if memory is not None else None
+            }
+            for stage in STAGES
+        }
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=list(CORPUS), default=list(CORPUS))
+    parser.add_argument('--repeat', type=int, default=1, help="timed renders per case; the median is reported")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="skip the extra render that measures peak memory")
+    parser.add_argument('--width', type=int, default=854)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--frame-rate', type=int, default=15)
+    parser.add_argument('--glow-mode', choices=['stream', 'post', 'parallel', 'none'], default='post')
+    parser.add_argument('--preset', default='ultrafast', help="the ffmpeg preset of every encode")
+    parser.add_argument('--output', default='stages.json', help="the JSON file the results are written to")
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {}
+    with TemporaryDirectory(prefix='CodeVideoRenderer-benchmark-') as work_dir:
+        args.work_dir = work_dir
+        print(f"{'case':>20} {'stage':>13} {'seconds':>9} {'calls':>7} {'frames':>7} {'peak MiB':>9}")
+        for name in args.cases:
+            result = results[name] = measure(name, args)
+            for stage, values in result['stages'].items():
+                peak = '-' if values['peak_mib'] is None else f"{values['peak_mib']:.1f}"
+                print(f"{name:>20} {stage:>13} {values['seconds']:>9.3f} {values['calls']:>7} {'':>7} {peak:>9}")
+            print(f"{name:>20} {'total':>13} {result['total_seconds']:>9.3f} {'':>7} {result['frames']:>7} {'':>9}")
+
+    report = {
+        'commit': gitCommit(),
+        'version': CodeVideoRenderer.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {
+            'repeat': args.repeat,
+            'resolution': [args.width, args.height],
+            'frame_rate': args.frame_rate,
+            'glow_mode': args.glow_mode,
+            'preset': args.preset
+        },
+        'max_rss_mib': maxRssMiB(),
+        'results': results
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"Results written to '{args.output}'.")
+
+if __name__ == '__main__':
+    main()